@@ -0,0 +1,2 @@
+"""HTTP search/detail service over the ABN database, plus a load generator (abr_service.loadgen)."""
+from abr_service.server import SearchService, serve
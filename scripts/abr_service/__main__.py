@@ -0,0 +1,15 @@
+import argparse
+import asyncio
+from abr_service.server import serve
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve ABN search and details over HTTP.")
+    parser.add_argument("--db", default=r"D:\FIRMABLE\db\abn.db", help="path to abn.db")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, help="read connections / threads (default: CPU count)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.db, args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
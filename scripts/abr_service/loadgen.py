@@ -0,0 +1,125 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlencode, urlsplit
+from bench_util import latency_stats
+from query_db import ENTITY_TYPES, connect_readonly
+
+# Share of each request kind in the generated mix
+MIX = {"name": 0.6, "abn": 0.1, "details": 0.3}
+STATES = ["", "", "", "NSW", "VIC", "QLD", "WA", "SA"]
+ENTITY_TYPE_FILTERS = ["", "", ""] + list(ENTITY_TYPES)
+
+def build_mix(db_path, count=2000, seed=0):
+    """Request paths shaped like frontend traffic: typed name prefixes (some filtered or paged), ABNs and details."""
+    rng = random.Random(seed)
+    conn = connect_readonly(db_path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT MAX(id) FROM search_names")
+    max_id = cursor.fetchone()[0] or 1
+
+    paths = []
+    kinds = list(MIX)
+    while len(paths) < count:
+        cursor.execute("SELECT abn, name FROM search_names WHERE id = ?", (rng.randint(1, max_id),))
+        row = cursor.fetchone()
+        if not row:
+            continue
+        abn, name = row
+        kind = rng.choices(kinds, weights=[MIX[k] for k in kinds])[0]
+        if kind == "details":
+            paths.append("/api/details?" + urlencode({"abn": abn}))
+            continue
+        params = {"query": abn} if kind == "abn" else {"query": name[:rng.randint(3, 10)].strip()}
+        if len(params["query"]) < 3:
+            continue
+        state, entity_type = rng.choice(STATES), rng.choice(ENTITY_TYPE_FILTERS)
+        if state:
+            params["state"] = state
+        if entity_type:
+            params["entityType"] = entity_type
+        if rng.random() < 0.1:
+            params["page"] = rng.randint(2, 5)
+        paths.append("/api/search?" + urlencode(params))
+    conn.close()
+    return paths
+
+async def client(host, port, paths, deadline, latencies, errors):
+    """One keep-alive connection sending paths in turn until they run out or the deadline passes."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while paths and time.perf_counter() < deadline:
+            path = paths.pop()
+            kind = path.split("?")[0]
+            start = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.setdefault(kind, []).append((time.perf_counter() - start) * 1000)
+            # A missing ABN is a normal answer, not an error
+            if status not in (200, 404):
+                errors[status] = errors.get(status, 0) + 1
+    finally:
+        writer.close()
+
+async def run_load(url, paths, concurrency=32, duration=None):
+    """Replay paths against url with concurrency connections. Returns a report dict."""
+    parts = urlsplit(url)
+    queue = list(reversed(paths))
+    latencies = {}
+    errors = {}
+    deadline = time.perf_counter() + duration if duration else float("inf")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(parts.hostname, parts.port or 80, queue, deadline, latencies, errors)
+                           for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    report = {"requests": sum(len(values) for values in latencies.values()), "seconds": elapsed,
+              "concurrency": concurrency, "errors": errors, "endpoints": {}}
+    report["qps"] = report["requests"] / elapsed if elapsed else 0.0
+    for kind, values in sorted(latencies.items()) + [("all", [v for values in latencies.values() for v in values])]:
+        if values:
+            report["endpoints"][kind] = {"requests": len(values), **latency_stats(values, 0.90, 0.99),
+                                         "max_ms": max(values)}
+    return report
+
+def print_report(report):
+    print(f"{report['requests']} requests in {report['seconds']:.1f} s with {report['concurrency']} connections: "
+          f"{report['qps']:.0f} q/s, errors {report['errors'] or 'none'}")
+    for kind, stats in report["endpoints"].items():
+        print(f"  {kind:14} {stats['requests']:7} req  p50 {stats['p50_ms']:7.1f} ms  p90 {stats['p90_ms']:7.1f} ms  "
+              f"p99 {stats['p99_ms']:7.1f} ms  max {stats['max_ms']:7.1f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a search/detail query mix against abr_service.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--db", default=r"D:\FIRMABLE\db\abn.db", help="database to draw the generated mix from")
+    parser.add_argument("--paths", help="file of request paths to replay instead, one per line")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    if args.paths:
+        with open(args.paths, encoding="utf-8") as f:
+            paths = [line.strip() for line in f if line.strip()][:args.requests]
+    else:
+        paths = build_mix(args.db, args.requests)
+    report = asyncio.run(run_load(args.url, paths, args.concurrency, args.duration))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
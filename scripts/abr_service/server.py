@@ -0,0 +1,192 @@
+import asyncio
+import json
+import math
+import sys
+import time
+import traceback
+from urllib.parse import parse_qs, urlsplit
+from db_pool import ReadPool
+from query_db import ENTITY_TYPES, count_names, search_names
+
+MAX_PAGE_SIZE = 100
+# Name search totals stop counting this far past the requested page
+COUNT_AHEAD = 1000
+MAX_REQUEST_LINE = 8192
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+def search_abn(cursor, abn, state="", entity_type="", limit=10, offset=0):
+    """Numeric query: the ABN's names, with the same filters and columns as the name search."""
+    sql = "SELECT abn, name, state, postcode FROM search_names WHERE abn = ?"
+    params = [abn]
+    if state:
+        sql += " AND state = ?"
+        params.append(state)
+    if entity_type:
+        sql += " AND entity_type_text = ?"
+        params.append(entity_type)
+    cursor.execute(sql + " ORDER BY id LIMIT ? OFFSET ?", params + [limit, offset])
+    rows = cursor.fetchall()
+    cursor.execute(f"SELECT COUNT(*) FROM ({sql})", params)
+    return rows, cursor.fetchone()[0], True
+
+def search_name(cursor, query, state="", entity_type="", limit=10, offset=0):
+    """A page of the name search and an at_least total, so a common prefix doesn't count every match."""
+    total, exact = count_names(cursor, query, state, entity_type, "at_least", offset + limit + COUNT_AHEAD)
+    return search_names(cursor, query, state, entity_type, limit, offset), total, exact
+
+def entity_doc(cursor, abn):
+    """The stored JSON document for abn, as text, so it can be sent without re-encoding."""
+    cursor.execute("SELECT doc FROM entity_docs WHERE abn = ?", (abn,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+class SearchService:
+    """Search and detail endpoints over a ReadPool, with identical in-flight requests coalesced.
+
+    Same JSON as the frontend routes, except name search totals are capped (pagination.totalExact is then false).
+    """
+
+    def __init__(self, db_path, workers=None):
+        self.pool = ReadPool(db_path, size=workers)
+        self.pool.warm()
+        self.in_flight = {}
+        self.requests = self.coalesced = 0
+
+    async def query(self, key, fn, *args):
+        """Run fn(cursor, *args) on the pool; concurrent calls with the same key share one run."""
+        future = self.in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+        future = asyncio.wrap_future(self.pool.submit(fn, *args))
+        self.in_flight[key] = future
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if self.in_flight.get(key) is future:
+                del self.in_flight[key]
+
+    async def search(self, params):
+        query = params.get("query", "").strip()
+        state = params.get("state", "").strip()
+        entity_type = ENTITY_TYPES.get(params.get("entityType", ""), "")
+        try:
+            page = max(1, int(params.get("page", "1")))
+            page_size = min(MAX_PAGE_SIZE, max(1, int(params.get("pageSize", "10"))))
+        except ValueError:
+            raise HTTPError(400, "page and pageSize must be integers")
+        if not query:
+            raise HTTPError(400, "Query is required")
+        if len(query) < 3:
+            raise HTTPError(400, "Query must be at least 3 characters")
+
+        offset = (page - 1) * page_size
+        # Digits only, as in the frontend route; a spaced ABN is searched as a name
+        if query.isdigit():
+            fn = search_abn
+        else:
+            fn, query = search_name, " ".join(query.lower().split())
+        rows, total, exact = await self.query(("search", fn.__name__, query, state, entity_type, page_size, offset),
+                                       fn, query, state, entity_type, page_size, offset)
+        return json.dumps({
+            "results": [{"abn": abn, "name": name, "state": row_state, "postcode": postcode}
+                        for abn, name, row_state, postcode in rows],
+            "pagination": {"page": page, "pageSize": page_size, "totalCount": total,
+                           "totalPages": math.ceil(total / page_size), "totalExact": exact},
+        })
+
+    async def details(self, params):
+        abn = "".join(params.get("abn", "").split())
+        if not abn:
+            raise HTTPError(400, "ABN is required")
+        doc = await self.query(("details", abn), entity_doc, abn)
+        if doc is None:
+            raise HTTPError(404, "ABN not found")
+        return doc
+
+    async def health(self, params):
+        return json.dumps({"status": "ok", "requests": self.requests, "coalesced": self.coalesced,
+                           "inFlight": len(self.in_flight)})
+
+    async def dispatch(self, method, target):
+        routes = {"/api/search": self.search, "/api/details": self.details, "/health": self.health}
+        url = urlsplit(target)
+        handler = routes.get(url.path)
+        if handler is None:
+            raise HTTPError(404, "Not found")
+        if method != "GET":
+            raise HTTPError(405, "Only GET is supported")
+        params = {name: values[0] for name, values in parse_qs(url.query).items()}
+        return await handler(params)
+
+    async def handle_connection(self, reader, writer):
+        """HTTP/1.1 with keep-alive; one request at a time per connection."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                if len(request_line) > MAX_REQUEST_LINE:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                # Bodies are ignored, but must be drained to find the next request
+                if headers.get("content-length", "0").isdigit() and int(headers.get("content-length", "0")):
+                    await reader.readexactly(int(headers["content-length"]))
+
+                parts = request_line.decode("latin-1").split()
+                version = parts[2] if len(parts) == 3 else "HTTP/1.0"
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                start = time.perf_counter()
+                self.requests += 1
+                try:
+                    if len(parts) != 3:
+                        raise HTTPError(400, "Malformed request line")
+                    status, body = 200, await self.dispatch(parts[0], parts[1])
+                except HTTPError as e:
+                    status, body = e.status, json.dumps({"error": str(e)})
+                except Exception:
+                    # The message can carry SQL and schema details, so it stays in the log
+                    print(f"Error handling {request_line.decode('latin-1').strip()!r}:", file=sys.stderr)
+                    traceback.print_exc()
+                    status, body = 500, json.dumps({"error": "Internal server error"})
+
+                payload = body.encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Server-Timing: total;dur={(time.perf_counter() - start) * 1000:.1f}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def close(self):
+        self.pool.close()
+
+async def serve(db_path, host="127.0.0.1", port=8000, workers=None):
+    service = SearchService(db_path, workers)
+    server = await asyncio.start_server(service.handle_connection, host, port, backlog=1024)
+    print(f"Serving {db_path} on http://{host}:{port} with {service.pool.size} read connections")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
@@ -0,0 +1,136 @@
+import sys
+import time
+from lxml import etree
+from parse_xml import clean_name, clean_text, new_batch, add_record
+
+def legacy_add_record(batch, elem):
+    """The original ElementPath-based extraction, kept as the baseline."""
+    # ABR attributes
+    record_last_updated = clean_text(elem.get("recordLastUpdatedDate"))
+
+    # ABN
+    abn_elem = elem.find(".//ABN")
+    abn = clean_text(abn_elem.text) if abn_elem is not None else ""
+    status = clean_text(abn_elem.get("status")) if abn_elem is not None else ""
+    status_date = clean_text(abn_elem.get("ABNStatusFromDate")) if abn_elem is not None else ""
+
+    # Skip if ABN is missing
+    if not abn:
+        return False
+
+    # Entity type
+    entity_type_ind = clean_text(elem.findtext(".//EntityType/EntityTypeInd") or "")
+    entity_type_text = clean_text(elem.findtext(".//EntityType/EntityTypeText") or "")
+
+    # Main entity (non-individuals)
+    main_name = ""
+    main_name_type = ""
+    main_name_elem = elem.find(".//MainEntity/NonIndividualName")
+    if main_name_elem is not None:
+        main_name_type = clean_text(main_name_elem.get("type"))
+        main_name = clean_name(main_name_elem.findtext("NonIndividualNameText") or "")
+
+    # Legal entity (individuals)
+    legal_name_type = ""
+    name_title = ""
+    given_name = ""
+    family_name = ""
+    legal_name_elem = elem.find(".//LegalEntity/IndividualName")
+    if legal_name_elem is not None:
+        legal_name_type = clean_text(legal_name_elem.get("type"))
+        name_title = clean_text(legal_name_elem.findtext("NameTitle") or "")
+        given_name = clean_text(legal_name_elem.findtext("GivenName") or "")
+        family_name = clean_text(legal_name_elem.findtext("FamilyName") or "")
+
+    # Address
+    state = clean_text(elem.findtext(".//BusinessAddress/AddressDetails/State") or "")
+    postcode = clean_text(elem.findtext(".//BusinessAddress/AddressDetails/Postcode") or "")
+
+    # ASIC number
+    asic_number = ""
+    asic_number_type = ""
+    asic_elem = elem.find(".//ASICNumber")
+    if asic_elem is not None:
+        asic_number = clean_text(asic_elem.text or "")
+        asic_number_type = clean_text(asic_elem.get("ASICNumberType") or "")
+
+    # GST status
+    gst_status = ""
+    gst_status_date = ""
+    gst_elem = elem.find(".//GST")
+    if gst_elem is not None:
+        gst_status = clean_text(gst_elem.get("status") or "")
+        gst_status_date = clean_text(gst_elem.get("GSTStatusFromDate") or "")
+
+    # DGR funds
+    dgrs = []
+    for dgr_elem in elem.findall(".//DGR"):
+        dgr_status_date = clean_text(dgr_elem.get("DGRStatusFromDate") or "")
+        dgr_name_elem = dgr_elem.find("NonIndividualName")
+        dgr_name_type = clean_text(dgr_name_elem.get("type") or "") if dgr_name_elem is not None else ""
+        dgr_name = clean_name(dgr_name_elem.findtext("NonIndividualNameText") or "") if dgr_name_elem is not None else ""
+        if dgr_status_date or dgr_name:
+            dgrs.append((dgr_status_date, dgr_name_type, dgr_name))
+
+    # Other entities
+    other_entities = []
+    for other_elem in elem.findall(".//OtherEntity/NonIndividualName"):
+        name_type = clean_text(other_elem.get("type") or "")
+        name_text = clean_name(other_elem.findtext("NonIndividualNameText") or "")
+        if name_type and name_text:
+            other_entities.append((name_type, name_text))
+
+    # Add to batch
+    batch["abrs"].append((abn, record_last_updated))
+    batch["abns"].append((abn, status, status_date))
+    batch["entity_types"].append((abn, entity_type_ind, entity_type_text))
+    if main_name:
+        batch["main_entities"].append((abn, main_name_type, main_name))
+    if given_name or family_name:
+        batch["legal_entities"].append((abn, legal_name_type, name_title, given_name, family_name))
+    if state or postcode:
+        batch["addresses"].append((abn, state, postcode))
+    if asic_number:
+        batch["asic_numbers"].append((abn, asic_number, asic_number_type))
+    if gst_status:
+        batch["gst_statuses"].append((abn, gst_status, gst_status_date))
+    for dgr_status_date, dgr_name_type, dgr_name in dgrs:
+        batch["dgrs"].append((abn, dgr_status_date, dgr_name_type, dgr_name))
+    for name_type, name in other_entities:
+        batch["other_entities"].append((abn, name_type, name))
+    return True
+
+def run(file_path, extract, limit=None):
+    """Time only the extraction step over every ABR element in the file."""
+    batch = new_batch()
+    records = 0
+    extract_seconds = 0.0
+    for event, elem in etree.iterparse(file_path, events=("end",), tag="ABR"):
+        start = time.perf_counter()
+        extract(batch, elem)
+        extract_seconds += time.perf_counter() - start
+        records += 1
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+        if limit and records >= limit:
+            break
+    return records, extract_seconds, batch
+
+def bench_extract(file_path, limit=None):
+    print(f"Benchmarking record extraction on {file_path}...")
+    results = {}
+    for name, extract in [("before", legacy_add_record), ("after", add_record)]:
+        records, seconds, batch = run(file_path, extract, limit)
+        results[name] = batch
+        print(f"  {name}: {records} records in {seconds:.2f} s, {records / seconds:.0f} records/s")
+
+    # The baseline predates entity_docs, so compare the table rows only
+    for table in results["before"]:
+        if table != "entity_docs" and results["before"][table] != results["after"][table]:
+            raise AssertionError(f"Extraction output for {table} differs between the two implementations")
+    print("  Output identical.")
+
+if __name__ == "__main__":
+    file_path = sys.argv[1] if len(sys.argv) > 1 else r"D:\FIRMABLE\data\xml\20250409_Public01.xml"
+    bench_extract(file_path)
@@ -0,0 +1,49 @@
+import sqlite3
+import sys
+from bench_util import best_of_ms, latency_stats
+from query_db import partition_exists, search_names
+
+QUERIES = ["aus", "aust", "the", "smith", "pty", "holdings", "forest coach", "national"]
+STATES = ["NSW", "VIC", "QLD", "WA", "SA", "TAS", "ACT", "NT"]
+ENTITY_TYPES = ["", "Australian Private Company"]
+METHODS = ["post_filter", "columns", "partitions"]
+# Fewer names than this is a sample, not the full register
+FULL_DATASET_NAMES = 1000000
+
+def bench_filtered_fts(db_path, repeat=3):
+    """Compare filter strategies for filtered name searches, checking each against post_filter first."""
+    print(f"Benchmarking filtered name search on {db_path}...")
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM search_names")
+    names = cursor.fetchone()[0]
+    methods = METHODS
+    if not all(partition_exists(cursor, state) for state in STATES):
+        # search_names would quietly fall back to "columns"
+        print("  per-state partitions not built (setup_search_index(..., partition_by_state=True)); skipping them")
+        methods = [method for method in METHODS if method != "partitions"]
+
+    timings = {method: [] for method in methods}
+    for query in QUERIES:
+        for state in STATES:
+            for entity_type in ENTITY_TYPES:
+                expected = set(search_names(cursor, query, state, entity_type, limit=-1, method="post_filter"))
+                for method in methods:
+                    if set(search_names(cursor, query, state, entity_type, limit=-1, method=method)) != expected:
+                        raise AssertionError(f"{method} returned different rows for {query!r} {state} {entity_type!r}")
+                    timings[method].append(best_of_ms(
+                        lambda: search_names(cursor, query, state, entity_type, method=method), repeat))
+
+    conn.close()
+    print(f"  {len(QUERIES) * len(STATES) * len(ENTITY_TYPES)} filtered queries over {names} names, first page, best of {repeat}")
+    if names < FULL_DATASET_NAMES:
+        print("  note: this is a sample database; these figures say nothing about the full register, "
+              "which has to be benchmarked separately")
+    for method, values in timings.items():
+        stats = latency_stats(values, 0.99)
+        print(f"  {method:12} p50 {stats['p50_ms']:8.2f} ms  p99 {stats['p99_ms']:8.2f} ms  total {sum(values):9.1f} ms")
+    return timings
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else r"D:\FIRMABLE\db\abn.db"
+    bench_filtered_fts(db_path)
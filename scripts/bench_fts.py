@@ -0,0 +1,71 @@
+import os
+import sqlite3
+import sys
+import time
+from bench_util import best_of_ms, latency_stats
+from setup_fts import fts_options
+from query_db import fts_prefix_query
+
+VARIANTS = {
+    "default": {},
+    "prefix": {"prefix": "2 3 4"},
+    "prefix+diacritics": {"prefix": "2 3 4", "tokenize": "unicode61 remove_diacritics 2"},
+    "prefix+detail=column": {"prefix": "2 3 4", "tokenize": "unicode61 remove_diacritics 2", "detail": "column"},
+    "prefix+detail=column+columnsize=0": {
+        "prefix": "2 3 4", "tokenize": "unicode61 remove_diacritics 2", "detail": "column", "columnsize": False
+    },
+}
+
+QUERIES = [
+    "au", "aus", "aust", "sm", "smi", "smit", "th", "the", "co", "con", "pt", "ho", "hol",
+    "ma", "mar", "gr", "gro", "ne", "new", "a", "s", "m"
+]
+
+def index_size(cursor, table):
+    cursor.execute(f"SELECT COALESCE(SUM(LENGTH(block)), 0) FROM {table}_data")
+    data = cursor.fetchone()[0]
+    cursor.execute(f"SELECT COUNT(*) FROM {table}_idx")
+    return data, cursor.fetchone()[0]
+
+def bench_fts(db_path, repeat=5, variants=VARIANTS):
+    """Rebuild the name index with each set of FTS5 options in a scratch database and time short-prefix searches."""
+    scratch_path = db_path + ".ftsbench"
+    if os.path.exists(scratch_path):
+        os.remove(scratch_path)
+    conn = sqlite3.connect(scratch_path)
+    cursor = conn.cursor()
+    cursor.execute("ATTACH DATABASE ? AS source", (f"file:{db_path}?mode=ro",))
+    cursor.execute("PRAGMA journal_mode = OFF")
+
+    print(f"Benchmarking FTS5 options on {db_path}...")
+    results = {}
+    for name, options in variants.items():
+        table = "bench_" + "".join(c if c.isalnum() else "_" for c in name)
+        start = time.perf_counter()
+        cursor.execute(f"CREATE VIRTUAL TABLE {table} USING fts5(name, content=''{fts_options(options)})")
+        # Contentless tables with columnsize=0 need an explicit rowid
+        cursor.execute(f"""
+            INSERT INTO {table}(rowid, name)
+            SELECT ROW_NUMBER() OVER (), name FROM (
+                SELECT name FROM source.main_entities UNION ALL SELECT name FROM source.other_entities
+            )
+        """)
+        cursor.execute(f"INSERT INTO {table}({table}) VALUES('optimize')")
+        conn.commit()
+        build_seconds = time.perf_counter() - start
+        size, pages = index_size(cursor, table)
+
+        sql = f"SELECT rowid FROM {table} WHERE {table} MATCH ? ORDER BY rank LIMIT 10"
+        timings = [best_of_ms(lambda: cursor.execute(sql, (fts_prefix_query(query),)).fetchall(), repeat)
+                   for query in QUERIES]
+        results[name] = {"build_seconds": build_seconds, "index_bytes": size, **latency_stats(timings, 0.99)}
+        print(f"  {name:34} {size / 1048576:8.1f} MB  build {build_seconds:6.1f} s  "
+              f"p50 {results[name]['p50_ms']:7.2f} ms  p99 {results[name]['p99_ms']:7.2f} ms")
+
+    conn.close()
+    os.remove(scratch_path)
+    return results
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else r"D:\FIRMABLE\db\abn.db"
+    bench_fts(db_path)
@@ -0,0 +1,79 @@
+import csv
+import random
+import sqlite3
+import sys
+import time
+from bench_util import latency_stats
+from fuzzy_match import fuzzy_search, normalize_name
+
+def perturb(name, rng):
+    """A misspelt version of name: one dropped, swapped, doubled or replaced letter, and suffix noise."""
+    chars = list(name)
+    positions = [i for i, c in enumerate(chars) if c.isalpha()]
+    if positions:
+        i = rng.choice(positions)
+        edit = rng.choice(["drop", "swap", "double", "replace"])
+        if edit == "drop":
+            del chars[i]
+        elif edit == "swap" and i + 1 < len(chars):
+            chars[i], chars[i + 1] = chars[i + 1], chars[i]
+        elif edit == "double":
+            chars.insert(i, chars[i])
+        else:
+            chars[i] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    typo = "".join(chars)
+    # Users rarely type the legal suffix the way it was registered
+    for suffix in (" pty ltd", " limited", " ltd"):
+        if typo.endswith(suffix):
+            return typo[:-len(suffix)] + rng.choice(["", " pty ltd", " ltd", " limited"])
+    return typo
+
+def sample_queries(cursor, count, seed=0):
+    """(query, abn, name) triples: random names from search_names with a typo added."""
+    rng = random.Random(seed)
+    cursor.execute("SELECT MAX(id) FROM search_names")
+    max_id = cursor.fetchone()[0] or 0
+    queries = []
+    while max_id and len(queries) < count:
+        cursor.execute("SELECT abn, name FROM search_names WHERE id = ?", (rng.randint(1, max_id),))
+        row = cursor.fetchone()
+        if row and len(normalize_name(row[1])) >= 4:
+            queries.append((perturb(row[1], rng), row[0], row[1]))
+    return queries
+
+def load_queries(csv_path):
+    """(query, abn, None) triples from a labelled CSV with query and abn columns."""
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        return [(row["query"], row["abn"], None) for row in csv.DictReader(f)]
+
+def bench_fuzzy(db_path, csv_path=None, count=500, k=10):
+    """Latency and recall@1 / recall@k of fuzzy_search, over csv_path or typo'd names sampled from the database."""
+    print(f"Benchmarking fuzzy name search on {db_path}...")
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    cursor = conn.cursor()
+    queries = load_queries(csv_path) if csv_path else sample_queries(cursor, count)
+
+    timings = []
+    hits_at_1 = hits_at_k = 0
+    for query, abn, name in queries:
+        start = time.perf_counter()
+        results = fuzzy_search(cursor, query, k=k)
+        timings.append((time.perf_counter() - start) * 1000)
+
+        target = normalize_name(name) if name else None
+        hits = [result_abn == abn or normalize_name(result_name) == target for _, result_abn, result_name in results]
+        hits_at_1 += bool(hits[:1] and hits[0])
+        hits_at_k += any(hits)
+
+    conn.close()
+    total = len(queries) or 1
+    stats = latency_stats(timings, 0.99)
+    print(f"  {len(queries)} queries, k={k}")
+    print(f"  recall@1 {hits_at_1 / total:.3f}  recall@{k} {hits_at_k / total:.3f}")
+    print(f"  p50 {stats['p50_ms']:.2f} ms  p99 {stats['p99_ms']:.2f} ms")
+    return {"queries": len(queries), "recall_at_1": hits_at_1 / total, "recall_at_k": hits_at_k / total, **stats}
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else r"D:\FIRMABLE\db\abn.db"
+    csv_path = sys.argv[2] if len(sys.argv) > 2 else None
+    bench_fuzzy(db_path, csv_path)
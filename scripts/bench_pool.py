@@ -0,0 +1,72 @@
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from db_pool import ReadPool
+from query_db import ENTITY_TYPES, connect_readonly, get_entity, search_names
+
+QUERIES = ["aus", "aust", "smith", "holdings", "forest coach", "national", "bay", "trading"]
+STATES = ["", "NSW", "VIC", "QLD"]
+ENTITY_TYPE_FILTERS = ["", ENTITY_TYPES["Company"]]
+
+def workload(cursor):
+    """Search requests covering each query and filter combination, plus a detail lookup per search."""
+    requests = []
+    for query in QUERIES:
+        for state in STATES:
+            for entity_type in ENTITY_TYPE_FILTERS:
+                requests.append((search_names, (query, state, entity_type)))
+    cursor.execute("SELECT abn FROM entity_docs ORDER BY abn LIMIT ?", (len(requests),))
+    requests += [(get_entity, (abn,)) for (abn,) in cursor.fetchall()]
+    return requests
+
+def run_shared(db_path, requests, threads, rounds):
+    """One connection for everything, as the route modules do: requests queue on its lock."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+    lock = threading.Lock()
+
+    def call(fn, args):
+        with lock:
+            return fn(conn.cursor(), *args)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            list(executor.map(lambda request: call(*request), requests))
+        elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+def run_pool(db_path, requests, threads, rounds):
+    pool = ReadPool(db_path, size=threads)
+    pool.warm()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        futures = [pool.submit(fn, *args) for fn, args in requests]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - start
+    pool.close()
+    return elapsed
+
+def bench_pool(db_path, thread_counts=(1, 2, 4, 8), rounds=5):
+    """Search/detail QPS through one shared connection vs ReadPool, at several thread counts."""
+    print(f"Benchmarking read connection pool on {db_path}...")
+    conn = connect_readonly(db_path)
+    requests = workload(conn.cursor())
+    conn.close()
+    total = len(requests) * rounds
+    print(f"  {len(requests)} requests x {rounds} rounds")
+
+    results = {}
+    for threads in thread_counts:
+        shared = run_shared(db_path, requests, threads, rounds)
+        pooled = run_pool(db_path, requests, threads, rounds)
+        results[threads] = {"shared_qps": total / shared, "pool_qps": total / pooled}
+        print(f"  {threads:2} threads: shared connection {total / shared:8.0f} q/s   pool {total / pooled:8.0f} q/s")
+    return results
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else r"D:\FIRMABLE\db\abn.db"
+    bench_pool(db_path)
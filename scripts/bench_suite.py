@@ -0,0 +1,246 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from bench_util import best_of_ms, latency_stats
+from enrich_abns import ABN_WEIGHTS
+from index_db import add_indexes
+from parse_xml import process_all_files
+from query_db import connect_readonly, get_entity, search_names, search_names_page
+from setup_db import setup_database
+from setup_fts import setup_fts
+from setup_fts_triggers import setup_fts_triggers
+from setup_search_index import setup_search_index
+
+WORDS = (
+    "forest coach aus australia australian holdings trading services group woolworths bakery smith plumbing "
+    "electrical cafe müller ocean pacific north south east west bay city national capital investments "
+    "property developments consulting construction medical dental legal family super fund nominees "
+    "transport logistics farming pastoral engineering solutions digital media retail wholesale"
+).split()
+GIVEN_NAMES = "JOHN PAUL MARY SARAH DAVID MICHAEL EMMA JAMES OLIVIA WEI NGUYEN PRIYA".split()
+FAMILY_NAMES = "SMITH JONES WILLIAMS BROWN WILSON TAYLOR NGUYEN CHEN SINGH MÜLLER O'BRIEN".split()
+STATES = ["NSW", "VIC", "QLD", "WA", "SA", "TAS", "ACT", "NT"]
+ENTITY_TYPES = [
+    ("PRV", "Australian Private Company"), ("IND", "Individual/Sole Trader"), ("PTR", "Other Partnership"),
+    ("DIT", "Discretionary Investment Trust"), ("PUB", "Australian Public Company"),
+]
+
+def make_abn(body):
+    """A checksum-valid ABN from a 9 digit body: the two leading check digits are solved for."""
+    digits = f"{body:09d}"
+    partial = sum(int(c) * weight for c, weight in zip(digits, ABN_WEIGHTS[2:]))
+    value = -partial % 89
+    return f"{value // 10 + 1}{value % 10}{digits}"
+
+def xml_escape(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace("'", "&apos;")
+
+def company_name(rng):
+    name = " ".join(rng.choice(WORDS).upper() for _ in range(rng.randint(1, 4)))
+    return name + rng.choice([" PTY LTD", " PTY. LTD.", " LIMITED", " TRUST", ""])
+
+def write_record(f, rng, abn):
+    ind, text = rng.choice(ENTITY_TYPES)
+    status = "ACT" if rng.random() < 0.8 else "CAN"
+    updated = f"20{rng.randint(0, 24):02d}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}"
+    address = (f"<BusinessAddress><AddressDetails><State>{rng.choice(STATES)}</State>"
+               f"<Postcode>{rng.randint(2000, 7999)}</Postcode></AddressDetails></BusinessAddress>")
+    f.write(f'<ABR recordLastUpdatedDate="{updated}" replaced="N">')
+    f.write(f'<ABN status="{status}" ABNStatusFromDate="{updated}">{abn}</ABN>')
+    f.write(f"<EntityType><EntityTypeInd>{ind}</EntityTypeInd><EntityTypeText>{text}</EntityTypeText></EntityType>")
+    if ind == "IND":
+        given = "".join(f"<GivenName>{rng.choice(GIVEN_NAMES)}</GivenName>" for _ in range(rng.randint(1, 2)))
+        f.write(f'<LegalEntity><IndividualName type="LGL"><NameTitle>{rng.choice(["MR", "MS", "DR"])}</NameTitle>'
+                f"{given}<FamilyName>{xml_escape(rng.choice(FAMILY_NAMES))}</FamilyName></IndividualName>"
+                f"{address}</LegalEntity>")
+    else:
+        f.write(f'<MainEntity><NonIndividualName type="MN"><NonIndividualNameText>{xml_escape(company_name(rng))}'
+                f"</NonIndividualNameText></NonIndividualName>{address}</MainEntity>")
+        f.write(f'<ASICNumber ASICNumberType="undetermined">{rng.randint(1, 999999999):09d}</ASICNumber>')
+    if rng.random() < 0.6:
+        f.write(f'<GST status="{status}" GSTStatusFromDate="{updated}" />')
+    if rng.random() < 0.05:
+        f.write(f'<DGR DGRStatusFromDate="{updated}"><NonIndividualName type="DGR"><NonIndividualNameText>'
+                f"{xml_escape(company_name(rng))} FUND</NonIndividualNameText></NonIndividualName></DGR>")
+    for _ in range(rng.choices([0, 1, 2, 3], weights=[60, 25, 10, 5])[0]):
+        f.write(f'<OtherEntity><NonIndividualName type="{rng.choice(["TRD", "BN", "OTN"])}"><NonIndividualNameText>'
+                f"{xml_escape(company_name(rng))}</NonIndividualNameText></NonIndividualName></OtherEntity>")
+    f.write("</ABR>\n")
+
+def generate_xml(xml_dir, records, files=2, seed=0):
+    """Write a synthetic ABR extract of `records` records over `files` 20250409_PublicNN.xml files.
+
+    Output is deterministic for a given seed. Returns the generated ABNs.
+    """
+    rng = random.Random(seed)
+    os.makedirs(xml_dir, exist_ok=True)
+    bodies = rng.sample(range(10 ** 9), records)
+    abns = [make_abn(body) for body in bodies]
+    per_file = -(-records // files)
+    for n in range(files):
+        with open(os.path.join(xml_dir, f"20250409_Public{n + 1:02d}.xml"), "w", encoding="utf-8") as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n<Transfer>\n')
+            for abn in abns[n * per_file:(n + 1) * per_file]:
+                write_record(f, rng, abn)
+            f.write("</Transfer>\n")
+    return abns
+
+# Page the deep pagination queries fetch, 10 rows a page
+DEEP_PAGE = 51
+
+def workload(abns, seed=0):
+    """The fixed query set: name -> list of callables taking a cursor. page51_* fetch page DEEP_PAGE alone."""
+    rng = random.Random(seed)
+    point_abns = rng.sample(abns, min(200, len(abns)))
+    short = sorted({word[:3] for word in WORDS})
+    long = [f"{a} {b}" for a, b in zip(WORDS[::2], WORDS[1::2])]
+    filters = [(state, text) for state in STATES[:4] for _, text in ENTITY_TYPES[:2]]
+    tokens = {}
+    return {
+        "abn_lookup": [lambda c, abn=abn: get_entity(c, abn) for abn in point_abns],
+        "short_prefix": [lambda c, q=q: search_names(c, q) for q in short],
+        "long_prefix": [lambda c, q=q: search_names(c, q) for q in long],
+        "filtered": [lambda c, q=q, s=s, t=t: search_names(c, q, s, t) for q in short[:8] for s, t in filters],
+        "page51_offset": [lambda c, q=q: search_names(c, q, offset=(DEEP_PAGE - 1) * 10) for q in short[:8]],
+        "page51_keyset": [lambda c, q=q: search_names_page(c, q, after=page_token(c, q, DEEP_PAGE, tokens))
+                          for q in short[:8]],
+    }
+
+def page_token(cursor, query, page, tokens):
+    """Token for page `page` of query, found by walking the earlier pages once and kept in tokens."""
+    if query not in tokens:
+        token = None
+        for _ in range(page - 1):
+            rows, token = search_names_page(cursor, query, after=token)
+            if not token:
+                break
+        tokens[query] = token
+    return tokens[query]
+
+def time_workload(db_path, queries, repeat=3):
+    """Best of `repeat` timed runs per call, after one untimed run (statement preparation, page tokens)."""
+    conn = connect_readonly(db_path)
+    cursor = conn.cursor()
+    results = {}
+    for name, calls in queries.items():
+        timings = []
+        for call in calls:
+            call(cursor)
+            timings.append(best_of_ms(lambda: call(cursor), repeat))
+        results[name] = {"queries": len(timings), "mean_ms": statistics.fmean(timings), **latency_stats(timings, 0.95)}
+    conn.close()
+    return results
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(workdir, records=100000, files=2, seed=0, repeat=3):
+    """Generate data, build a database stage by stage and time the query workload. Returns the results dict."""
+    xml_dir = os.path.join(workdir, "xml")
+    db_path = os.path.join(workdir, "bench.db")
+    shutil.rmtree(xml_dir, ignore_errors=True)
+    for path in (db_path, db_path + "-wal", db_path + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+
+    stages = {}
+
+    def stage(name, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        stages[name] = time.perf_counter() - start
+        return result
+
+    abns = stage("generate_xml", generate_xml, xml_dir, records, files, seed)
+    stage("setup_database", setup_database, db_path)
+    stage("parse_and_insert", process_all_files, xml_dir, db_path)
+    stage("add_indexes", add_indexes, db_path)
+    stage("setup_fts", setup_fts, db_path)
+    stage("setup_fts_triggers", setup_fts_triggers, db_path)
+    stage("setup_search_index", setup_search_index, db_path)
+
+    return {
+        "revision": git_revision(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "records": records,
+        "seed": seed,
+        "db_bytes": os.path.getsize(db_path),
+        "stages": stages,
+        "records_per_second": records / stages["parse_and_insert"],
+        "queries": time_workload(db_path, workload(abns, seed), repeat),
+    }
+
+# Absolute slowdowns below these are timer noise, whatever the percentage
+NOISE = {"s": 0.05, "ms": 0.05}
+
+def compare(baseline, current, threshold=0.2):
+    """Stage times and query p50s more than threshold (a fraction) slower than baseline. Returns the regressions."""
+    rows = []
+    for name, seconds in current["stages"].items():
+        # Generating the input isn't part of what's being measured
+        if name in baseline["stages"] and name != "generate_xml":
+            rows.append((f"stage {name}", baseline["stages"][name], seconds, "s"))
+    for name, stats in current["queries"].items():
+        if name in baseline["queries"]:
+            rows.append((f"query {name} p50", baseline["queries"][name]["p50_ms"], stats["p50_ms"], "ms"))
+
+    regressions = []
+    for name, old, new, unit in rows:
+        change = (new - old) / old if old else 0.0
+        flag = "REGRESSION" if change > threshold and new - old > NOISE[unit] else ""
+        if flag:
+            regressions.append(name)
+        print(f"  {name:32} {old:10.3f} {unit:2} -> {new:10.3f} {unit:2}  {change:+7.1%} {flag}")
+    if baseline.get("records") != current.get("records"):
+        print(f"  note: record counts differ ({baseline.get('records')} vs {current.get('records')})")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest, index build and query latency benchmarks.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="generate data, build and benchmark")
+    run.add_argument("--workdir", default="bench_work")
+    run.add_argument("--records", type=int, default=100000)
+    run.add_argument("--files", type=int, default=2)
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--out", default="bench_results.json")
+    check = commands.add_parser("compare", help="compare two result files")
+    check.add_argument("baseline")
+    check.add_argument("current")
+    check.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown, as a fraction")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = run_suite(args.workdir, args.records, args.files, args.seed, args.repeat)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        for name, seconds in results["stages"].items():
+            print(f"  {name:20} {seconds:8.2f} s")
+        for name, stats in results["queries"].items():
+            print(f"  {name:20} p50 {stats['p50_ms']:8.2f} ms  p95 {stats['p95_ms']:8.2f} ms")
+        print(f"Results written to {args.out}")
+    else:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        with open(args.current, encoding="utf-8") as f:
+            current = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        print(f"{len(regressions)} regression(s)")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,24 @@
+import statistics
+import time
+
+def best_of_ms(fn, repeat):
+    """Fastest of `repeat` calls to fn(), in milliseconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of already sorted values."""
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def latency_stats(timings, *fractions):
+    """{"p50_ms": ..., "p99_ms": ...} for the given fractions (e.g. 0.99) of the timings, all 0.0 if there are none."""
+    timings = sorted(timings)
+    stats = {"p50_ms": statistics.median(timings) if timings else 0.0}
+    for fraction in fractions:
+        stats[f"p{round(fraction * 100)}_ms"] = percentile(timings, fraction) if timings else 0.0
+    return stats
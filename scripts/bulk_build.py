@@ -0,0 +1,121 @@
+import sqlite3
+import time
+import os
+from setup_db import create_tables
+from parse_xml import iter_batches, insert_batch, list_xml_files
+from parallel_ingest import run_parallel_ingest, print_report
+from index_db import create_indexes
+from setup_fts import create_fts_tables, populate_fts, optimize_fts
+from setup_fts_triggers import create_fts_triggers
+from setup_search_index import create_search_tables, populate_search_tables, create_search_triggers, create_term_counts
+
+def apply_bulk_pragmas(cursor, page_size, cache_mb):
+    # page_size only takes effect before the first table is created
+    cursor.execute(f"PRAGMA page_size = {int(page_size)}")
+    # No rollback journal and no fsyncs: a failed build is thrown away, not recovered
+    cursor.execute("PRAGMA journal_mode = OFF")
+    cursor.execute("PRAGMA synchronous = OFF")
+    cursor.execute(f"PRAGMA cache_size = -{int(cache_mb) * 1024}")
+    cursor.execute("PRAGMA temp_store = MEMORY")
+    cursor.execute("PRAGMA locking_mode = EXCLUSIVE")
+
+def load_serial(xml_files, cursor):
+    for file_path in xml_files:
+        print(f"Parsing {file_path}...")
+        record_count = 0
+        for record_count, batch in iter_batches(file_path):
+            insert_batch(cursor, batch)
+        print(f"Completed {file_path}: {record_count} records processed")
+
+def check_not_in_use(db_path):
+    """Refuse to swap while anything may have db_path open in WAL mode: it would pair the old file with the new WAL."""
+    # Read-only connections leave -wal and -shm behind even once closed; the last read-write one to close removes them
+    if os.path.exists(db_path + "-wal") or os.path.exists(db_path + "-shm"):
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA schema_version").fetchone()
+        conn.close()
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            raise RuntimeError(f"{db_path}{suffix} exists; close every connection to {db_path} "
+                               "(stop abr_service / ReadPool readers) before swapping in a new build")
+
+def bulk_build(xml_dir, db_path, workers=None, page_size=8192, cache_mb=1024, wal=False):
+    """Build a fresh database next to db_path, indexes and triggers last, and swap it into place when complete.
+
+    workers=1 parses in this process; wal=True leaves the new file in WAL mode for db_pool.py readers.
+    """
+    build_path = db_path + ".building"
+    check_not_in_use(db_path)
+    if os.path.exists(build_path):
+        os.remove(build_path)
+
+    print(f"Bulk building {build_path} from {xml_dir}...")
+    timings = {}
+    conn = sqlite3.connect(build_path)
+    cursor = conn.cursor()
+    try:
+        apply_bulk_pragmas(cursor, page_size, cache_mb)
+
+        start = time.perf_counter()
+        create_tables(cursor)
+        xml_files = list_xml_files(xml_dir)
+        if workers == 1:
+            load_serial(xml_files, cursor)
+        else:
+            print_report(run_parallel_ingest(xml_files, conn, workers, commit_each_batch=False))
+        conn.commit()
+        timings["load"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        create_indexes(cursor)
+        conn.commit()
+        timings["indexes"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        create_fts_tables(cursor)
+        populate_fts(cursor)
+        optimize_fts(cursor)
+        create_fts_triggers(cursor)
+        conn.commit()
+        timings["fts"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        create_search_tables(cursor)
+        populate_search_tables(cursor)
+        create_search_triggers(cursor)
+        create_term_counts(cursor)
+        conn.commit()
+        timings["search_index"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cursor.execute("ANALYZE")
+        cursor.execute("PRAGMA optimize")
+        conn.commit()
+        timings["analyze"] = time.perf_counter() - start
+
+        # Leave the finished file with normal journaling (or WAL) for later incremental loads
+        cursor.execute(f"PRAGMA journal_mode = {'WAL' if wal else 'DELETE'}")
+    except Exception:
+        conn.close()
+        os.remove(build_path)
+        raise
+    conn.close()
+
+    # The build can take hours; readers may have opened the old file since the first check
+    try:
+        check_not_in_use(db_path)
+    except RuntimeError:
+        print(f"New build left at {build_path}")
+        raise
+    # Atomic on the same filesystem, but only safe with no connections open (see check_not_in_use)
+    os.replace(build_path, db_path)
+
+    for stage, seconds in timings.items():
+        print(f"  {stage}: {seconds:.1f} s")
+    print(f"Bulk build complete: {db_path}")
+    return timings
+
+if __name__ == "__main__":
+    xml_dir = r"D:\FIRMABLE\data\xml"
+    db_path = r"D:\FIRMABLE\db\abn.db"
+    bulk_build(xml_dir, db_path)
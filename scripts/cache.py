@@ -0,0 +1,251 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from query_db import connect_readonly, count_names, get_entity, search_names_page
+
+class LRUCache:
+    """Size-bounded mapping that evicts the least recently used entry, with an optional TTL in seconds."""
+
+    def __init__(self, maxsize=10000, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key):
+        """(True, value) on a hit, (False, None) on a miss."""
+        entry = self.entries.get(key)
+        if entry is not None:
+            expires, value = entry
+            if expires is None or expires > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True, value
+            del self.entries[key]
+            self.expirations += 1
+        self.misses += 1
+        return False, None
+
+    def put(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        self.entries[key] = (expires, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key):
+        self.entries.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+class DataVersion:
+    """Generation of a database: PRAGMA data_version on a connection kept open, plus the inode (bulk_build swaps)."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = None
+        self.inode = None
+        self.opens = 0
+
+    def current(self):
+        inode = os.stat(self.db_path).st_ino
+        if inode != self.inode:
+            if self.conn is not None:
+                self.conn.close()
+            self.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+            self.inode = inode
+            self.opens += 1
+        return (inode, self.opens, self.conn.execute("PRAGMA data_version").fetchone()[0])
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+class SharedMemo:
+    """Cache entries in a local SQLite file shared by worker processes, under a generation any of them can advance."""
+
+    def __init__(self, path, ttl=None):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS memo (
+                key TEXT PRIMARY KEY,
+                kind TEXT,
+                generation TEXT,
+                expires REAL,
+                value TEXT
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS memo_generation (id INTEGER PRIMARY KEY, generation INTEGER)")
+        self.conn.execute("INSERT OR IGNORE INTO memo_generation (id, generation) VALUES (0, 0)")
+
+    def generation(self):
+        with self.lock:
+            return str(self.conn.execute("SELECT generation FROM memo_generation WHERE id = 0").fetchone()[0])
+
+    def advance(self):
+        """The database changed: start a new generation and drop the entries of older ones."""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.execute("UPDATE memo_generation SET generation = generation + 1 WHERE id = 0")
+            self.conn.execute("DELETE FROM memo WHERE generation != (SELECT generation FROM memo_generation "
+                              "WHERE id = 0) OR expires <= ?", (time.time(),))
+            self.conn.execute("COMMIT")
+
+    def get(self, key, generation):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value FROM memo WHERE key = ? AND generation = ? AND (expires IS NULL OR expires > ?)",
+                (json.dumps(key), generation, time.time())
+            ).fetchone()
+        return (True, json.loads(row[0])) if row else (False, None)
+
+    def put(self, key, generation, value):
+        expires = time.time() + self.ttl if self.ttl else None
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO memo (key, kind, generation, expires, value) VALUES (?, ?, ?, ?, ?)",
+                (json.dumps(key), key[0], generation, expires, json.dumps(value))
+            )
+
+    def close(self):
+        self.conn.close()
+
+class QueryCache:
+    """Cached front for the query_db.py read functions, flushed whenever the DataVersion changes.
+
+    Pass invalidate_abns as a loader's on_change to drop only the changed ABNs; shared_path adds a SharedMemo level.
+    """
+
+    def __init__(self, db_path, maxsize=10000, ttl=300, shared_path=None):
+        self.db_path = db_path
+        self.local = LRUCache(maxsize, ttl)
+        self.shared = SharedMemo(shared_path, ttl) if shared_path else None
+        if self.shared:
+            # Its entries may predate this process
+            self.shared.advance()
+        self.version = DataVersion(db_path)
+        self.generation = self.version.current()
+        self.shared_hits = self.invalidations = self.flushes = 0
+        self.lock = threading.Lock()
+        self.connections = threading.local()
+
+    def cursor(self):
+        # One read-only connection per thread, reopened after a flush so a
+        # replaced database file is picked up
+        conn = getattr(self.connections, "conn", None)
+        if conn is None or self.connections.generation != self.flushes:
+            if conn is not None:
+                conn.close()
+            conn = self.connections.conn = connect_readonly(self.db_path)
+            self.connections.generation = self.flushes
+        return conn.cursor()
+
+    def check_generation(self):
+        generation = self.version.current()
+        if generation != self.generation:
+            self.local.clear()
+            if self.shared:
+                self.shared.advance()
+            self.generation = generation
+            self.flushes += 1
+        return generation
+
+    def cached(self, key, compute, decode=None):
+        with self.lock:
+            generation = self.check_generation()
+            hit, value = self.local.get(key)
+            if hit:
+                return value
+        if self.shared:
+            # Read before computing, so a value is never stamped newer than the data it came from
+            shared_generation = self.shared.generation()
+            hit, value = self.shared.get(key, shared_generation)
+            if hit:
+                # JSON turned tuples into lists
+                value = decode(value) if decode else value
+                self.shared_hits += 1
+        if not hit:
+            value = compute(self.cursor())
+            if self.shared:
+                self.shared.put(key, shared_generation, value)
+        with self.lock:
+            # Don't keep a value computed against data that changed meanwhile
+            if generation == self.generation:
+                self.local.put(key, value)
+        return value
+
+    def search_page(self, query, state="", entity_type="", limit=10, after=None, order="id"):
+        query, state, entity_type = " ".join(query.lower().split()), state.strip().upper(), entity_type.strip()
+        return self.cached(
+            ("search", query, state, entity_type, limit, after, order),
+            lambda cursor: search_names_page(cursor, query, state, entity_type, limit, after, order),
+            lambda value: ([tuple(row) for row in value[0]], value[1])
+        )
+
+    def count(self, query, state="", entity_type="", mode="exact", cap=1000):
+        query, state, entity_type = " ".join(query.lower().split()), state.strip().upper(), entity_type.strip()
+        return self.cached(
+            ("count", query, state, entity_type, mode, cap),
+            lambda cursor: count_names(cursor, query, state, entity_type, mode, cap),
+            tuple
+        )
+
+    def entity(self, abn):
+        abn = "".join(str(abn).split())
+        return self.cached(("entity", abn), lambda cursor: get_entity(cursor, abn))
+
+    def invalidate_abns(self, abns):
+        """Loader hook, called right after each commit by the only writer. An empty set keeps every entry."""
+        abns = set(abns)
+        with self.lock:
+            generation = self.version.current()
+            if abns:
+                for key in [key for key in self.local.entries if key[0] != "entity"]:
+                    self.local.pop(key)
+                for abn in abns:
+                    self.local.pop(("entity", abn))
+                self.invalidations += 1
+                if self.shared:
+                    self.shared.advance()
+            self.generation = generation
+
+    def clear(self):
+        with self.lock:
+            self.local.clear()
+            self.generation = None
+
+    def stats(self):
+        local = self.local
+        lookups = local.hits + local.misses
+        return {
+            "size": len(local),
+            "hits": local.hits,
+            "misses": local.misses,
+            "hit_rate": local.hits / lookups if lookups else 0.0,
+            "shared_hits": self.shared_hits,
+            "evictions": local.evictions,
+            "expirations": local.expirations,
+            "invalidations": self.invalidations,
+            "flushes": self.flushes,
+        }
+
+    def close(self):
+        conn = getattr(self.connections, "conn", None)
+        if conn is not None:
+            conn.close()
+        self.version.close()
+        if self.shared:
+            self.shared.close()
@@ -0,0 +1,105 @@
+import os
+import queue
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from query_db import ENTITY_TYPES, count_names, get_entity, search_names, search_names_page
+
+# Filter combinations every statement is prepared for: (state, entity_type)
+FILTER_COMBINATIONS = [("", ""), ("NSW", ""), ("", ENTITY_TYPES["Company"]), ("NSW", ENTITY_TYPES["Company"])]
+
+# A term no name contains, so warming a statement reads next to nothing
+WARM_QUERY = "qqqqzzzz"
+
+def enable_wal(db_path):
+    """Switch the database to WAL so readers and a loader don't block each other. The mode is kept in the file."""
+    conn = sqlite3.connect(db_path)
+    mode = conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+    conn.close()
+    return mode
+
+def file_id(db_path):
+    st = os.stat(db_path)
+    return st.st_dev, st.st_ino
+
+class ReadPool:
+    """A fixed set of read-only connections to db_path and a thread pool to run queries on them.
+
+    warm() prepares every query kind up front. Close the pool before bulk_build swaps a WAL database.
+    """
+
+    def __init__(self, db_path, size=None, mmap_mb=256, cache_mb=64, cached_statements=256):
+        self.db_path = db_path
+        self.size = size or os.cpu_count() or 4
+        self.mmap_mb = mmap_mb
+        self.cache_mb = cache_mb
+        self.cached_statements = cached_statements
+        # (connection, file_id it was opened on); LIFO keeps the warmest connections busy
+        self.idle = queue.LifoQueue()
+        for _ in range(self.size):
+            self.idle.put((self.open(), file_id(db_path)))
+        self.executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="abn-read")
+
+    def open(self):
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        conn.execute(f"PRAGMA mmap_size = {self.mmap_mb * 1024 * 1024}")
+        # Negative cache_size is in KiB
+        conn.execute(f"PRAGMA cache_size = {-self.cache_mb * 1024}")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of the with block."""
+        conn, opened_on = self.idle.get()
+        try:
+            current = file_id(self.db_path)
+            if current != opened_on:
+                conn.close()
+                conn, opened_on = self.open(), current
+            yield conn
+        finally:
+            self.idle.put((conn, opened_on))
+
+    def run(self, fn, *args, **kwargs):
+        """fn(cursor, *args, **kwargs) on a pooled connection, in the calling thread."""
+        with self.connection() as conn:
+            return fn(conn.cursor(), *args, **kwargs)
+
+    def submit(self, fn, *args, **kwargs):
+        """Like run, on the pool's executor. Returns a Future."""
+        return self.executor.submit(self.run, fn, *args, **kwargs)
+
+    def search(self, query, state="", entity_type="", limit=10, offset=0):
+        return self.submit(search_names, query, state, entity_type, limit, offset)
+
+    def search_page(self, query, state="", entity_type="", limit=10, after=None, order="id"):
+        return self.submit(search_names_page, query, state, entity_type, limit, after, order)
+
+    def count(self, query, state="", entity_type="", mode="exact", cap=1000):
+        return self.submit(count_names, query, state, entity_type, mode, cap)
+
+    def entity(self, abn):
+        return self.submit(get_entity, abn)
+
+    def warm(self):
+        """Prepare every query kind x filter combination on every connection."""
+        held = [self.idle.get() for _ in range(self.size)]
+        try:
+            for conn, _ in held:
+                cursor = conn.cursor()
+                for state, entity_type in FILTER_COMBINATIONS:
+                    search_names(cursor, WARM_QUERY, state, entity_type)
+                    search_names_page(cursor, WARM_QUERY, state, entity_type)
+                    search_names_page(cursor, WARM_QUERY, state, entity_type, order="rank")
+                    for mode in ("exact", "at_least"):
+                        count_names(cursor, WARM_QUERY, state, entity_type, mode)
+                get_entity(cursor, "")
+        finally:
+            for entry in held:
+                self.idle.put(entry)
+
+    def close(self):
+        self.executor.shutdown()
+        while not self.idle.empty():
+            self.idle.get()[0].close()
@@ -0,0 +1,145 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from contextlib import ExitStack
+from query_db import connect_readonly
+
+ABN_WEIGHTS = [10, 1, 3, 5, 7, 9, 11, 13, 15, 17, 19]
+
+# Columns added to each CSV row
+ENRICHED_COLUMNS = [
+    "abn_valid", "found", "status", "entity_type", "name", "state", "postcode", "gst_status", "asic_number"
+]
+
+def normalize_abn(value):
+    return "".join(str(value or "").split())
+
+# The flat CSV fields, pulled out of the stored document by SQLite
+FLAT_FIELDS_SQL = """
+    'Y',
+    COALESCE(json_extract(d.doc, '$.status'), ''),
+    COALESCE(json_extract(d.doc, '$.entityTypeText'), ''),
+    COALESCE(json_extract(d.doc, '$.mainName.name'),
+             TRIM(COALESCE(json_extract(d.doc, '$.legalName.givenName'), '') || ' ' ||
+                  COALESCE(json_extract(d.doc, '$.legalName.familyName'), '')), ''),
+    COALESCE(json_extract(d.doc, '$.address.state'), ''),
+    COALESCE(json_extract(d.doc, '$.address.postcode'), ''),
+    COALESCE(json_extract(d.doc, '$.gst.status'), ''),
+    COALESCE(json_extract(d.doc, '$.asicNumber.number'), '')
+"""
+NOT_FOUND = ["N"] + [""] * (len(ENRICHED_COLUMNS) - 2)
+
+def abn_is_valid(abn):
+    """ABN checksum: subtract 1 from the first digit, weight the digits, sum must divide by 89."""
+    if len(abn) != 11 or not abn.isdigit() or abn[0] == "0":
+        return False
+    total = -ABN_WEIGHTS[0]
+    for c, weight in zip(abn, ABN_WEIGHTS):
+        total += (ord(c) - 48) * weight
+    return total % 89 == 0
+
+def lookup(cursor, abns, columns="d.doc"):
+    """Resolve a set of ABNs with one join against entity_docs. Returns {abn: columns}."""
+    cursor.execute("DELETE FROM temp.lookup_abns")
+    cursor.executemany("INSERT OR IGNORE INTO temp.lookup_abns (abn) VALUES (?)", ((abn,) for abn in sorted(abns)))
+    cursor.execute(f"""
+        SELECT d.abn, {columns}
+        FROM temp.lookup_abns l
+        JOIN entity_docs d ON d.abn = l.abn
+    """)
+    return {row[0]: row[1:] for row in cursor.fetchall()}
+
+def read_chunks(reader, chunk_size):
+    chunk = []
+    for record in reader:
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def read_jsonl(source, input_path):
+    for number, line in enumerate(source, 1):
+        if line.strip():
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError(f"{input_path} line {number}: expected a JSON object, got {type(record).__name__}")
+            yield record
+
+def enrich_file(input_path, output_path, db_path, column="abn", chunk_size=10000):
+    """Stream input_path (CSV or JSONL, '-' for stdin) to output_path with entity details added, a chunk at a time.
+
+    CSV rows get ENRICHED_COLUMNS appended; JSONL records get "abn_valid" and an "entity" document (or null).
+    """
+    is_jsonl = (output_path if input_path == "-" else input_path).endswith((".jsonl", ".ndjson"))
+    with ExitStack() as stack:
+        source = sys.stdin if input_path == "-" else stack.enter_context(
+            open(input_path, newline="", encoding="utf-8"))
+        if is_jsonl:
+            reader = read_jsonl(source, input_path)
+        else:
+            reader = csv.reader(source)
+            header = next(reader, [])
+            if column not in header:
+                raise ValueError(f"Column {column!r} not found in {input_path}")
+            index = header.index(column)
+        target = sys.stdout if output_path == "-" else stack.enter_context(
+            open(output_path, "w", newline="", encoding="utf-8"))
+        if not is_jsonl:
+            writer = csv.writer(target)
+            writer.writerow(header + ENRICHED_COLUMNS)
+
+        conn = connect_readonly(db_path)
+        stack.callback(conn.close)
+        cursor = conn.cursor()
+        cursor.execute("CREATE TEMP TABLE lookup_abns (abn TEXT PRIMARY KEY) WITHOUT ROWID")
+
+        start = time.perf_counter()
+        total = found = invalid = 0
+        for chunk in read_chunks(reader, chunk_size):
+            if is_jsonl:
+                abns = [normalize_abn(record.get(column)) for record in chunk]
+            else:
+                abns = [normalize_abn(row[index]) if index < len(row) else "" for row in chunk]
+            valid = [abn_is_valid(abn) for abn in abns]
+            wanted = {abn for abn, ok in zip(abns, valid) if ok}
+            results = lookup(cursor, wanted) if is_jsonl else lookup(cursor, wanted, FLAT_FIELDS_SQL)
+            found += sum(1 for abn in abns if abn in results)
+            invalid += valid.count(False)
+            total += len(chunk)
+
+            if is_jsonl:
+                for record, abn, ok in zip(chunk, abns, valid):
+                    # The stored document is already JSON, so splice it in without re-parsing.
+                    # abn_valid keeps the object non-empty, so the splice always follows a key.
+                    record.pop("entity", None)
+                    record["abn_valid"] = ok
+                    line = json.dumps(record, ensure_ascii=False)
+                    doc = results[abn][0] if abn in results else "null"
+                    target.write(f'{line[:-1]}, "entity": {doc}}}\n')
+            else:
+                writer.writerows(
+                    row + ["Y" if ok else "N"] + list(results.get(abn, NOT_FOUND))
+                    for row, abn, ok in zip(chunk, abns, valid)
+                )
+        elapsed = time.perf_counter() - start
+
+    print(f"Enriched {total} ABNs ({found} found, {invalid} invalid) in {elapsed:.1f} s, "
+          f"{total / elapsed if elapsed else 0:.0f} ABNs/s", file=sys.stderr)
+    return {"total": total, "found": found, "invalid": invalid, "seconds": elapsed}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enrich a CSV or JSONL file of ABNs from the ABR database.")
+    parser.add_argument("input", help="input .csv or .jsonl file, or - for stdin")
+    parser.add_argument("output", help="output file (same format as the input), or - for stdout")
+    parser.add_argument("--db", default=r"D:\FIRMABLE\db\abn.db", help="path to abn.db")
+    parser.add_argument("--column", default="abn", help="CSV column / JSON key holding the ABN")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    args = parser.parse_args()
+    if not os.path.exists(args.db):
+        parser.error(f"database not found: {args.db}")
+    enrich_file(args.input, args.output, args.db, args.column, args.chunk_size)
@@ -0,0 +1,60 @@
+import sqlite3
+from setup_db import create_entity_docs_table
+
+# Builds the same JSON document as parse_xml.add_record from the ABN's rows,
+# for databases loaded before entity_docs existed or edited outside the loader
+ENTITY_DOC_SQL = """
+    SELECT r.abn, json_object(
+        'abn', r.abn,
+        'status', n.status,
+        'statusDate', n.status_date,
+        'lastUpdated', r.record_last_updated_date,
+        'entityTypeInd', NULLIF(et.entity_type_ind, ''),
+        'entityTypeText', NULLIF(et.entity_type_text, ''),
+        'mainName', json((SELECT json_object('name', name, 'type', name_type)
+                          FROM main_entities WHERE abn = r.abn LIMIT 1)),
+        'legalName', json((SELECT json_object('title', name_title, 'givenName', given_name,
+                                              'familyName', family_name, 'type', name_type)
+                           FROM legal_entities WHERE abn = r.abn LIMIT 1)),
+        'address', json((SELECT json_object('state', state, 'postcode', postcode)
+                          FROM addresses WHERE abn = r.abn LIMIT 1)),
+        'asicNumber', json((SELECT json_object('number', asic_number, 'type', asic_number_type)
+                            FROM asic_numbers WHERE abn = r.abn LIMIT 1)),
+        'gst', json((SELECT json_object('status', status, 'statusDate', status_date)
+                      FROM gst_statuses WHERE abn = r.abn LIMIT 1)),
+        'dgrs', (SELECT json_group_array(json_object('statusDate', status_date, 'name', name, 'type', name_type))
+                 FROM dgrs WHERE abn = r.abn),
+        'otherNames', (SELECT json_group_array(json_object('name', name, 'type', name_type))
+                       FROM other_entities WHERE abn = r.abn)
+    )
+    FROM abrs r
+    LEFT JOIN abns n ON n.abn = r.abn
+    LEFT JOIN entity_types et ON et.abn = r.abn
+"""
+
+def refresh_entity_docs(cursor, abns):
+    """Rebuild the documents for the given ABNs from their rows."""
+    abns = list(abns)
+    for i in range(0, len(abns), 500):
+        chunk = abns[i:i + 500]
+        placeholders = ",".join("?" * len(chunk))
+        cursor.execute(f"DELETE FROM entity_docs WHERE abn IN ({placeholders})", chunk)
+        cursor.execute(f"INSERT INTO entity_docs (abn, doc) {ENTITY_DOC_SQL} WHERE r.abn IN ({placeholders})", chunk)
+
+def build_entity_docs(db_path):
+    """Backfill entity_docs for every ABN. Needs the idx_*_abn indexes from index_db.py."""
+    print(f"Building entity documents in {db_path}...")
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    create_entity_docs_table(cursor)
+    cursor.execute("DELETE FROM entity_docs")
+    cursor.execute(f"INSERT INTO entity_docs (abn, doc) {ENTITY_DOC_SQL} ORDER BY r.abn")
+
+    conn.commit()
+    print("Entity documents built.")
+    conn.close()
+
+if __name__ == "__main__":
+    db_path = r"D:\FIRMABLE\db\abn.db"
+    build_entity_docs(db_path)
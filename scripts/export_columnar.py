@@ -0,0 +1,328 @@
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import time
+from parse_xml import iter_batches, list_xml_files
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Low-cardinality columns, stored as dictionary<int32, string>
+CATEGORICAL = {
+    "status", "entity_type_ind", "entity_type_text", "main_name_type", "legal_name_type", "name_title",
+    "state", "asic_number_type", "gst_status", "name_type",
+}
+DATES = {"record_last_updated_date", "status_date", "gst_status_date"}
+
+# Column -> path into the entity_docs document
+ENTITY_FIELDS = {
+    "abn": ("abn",),
+    "record_last_updated_date": ("lastUpdated",),
+    "status": ("status",),
+    "status_date": ("statusDate",),
+    "entity_type_ind": ("entityTypeInd",),
+    "entity_type_text": ("entityTypeText",),
+    "main_name_type": ("mainName", "type"),
+    "main_name": ("mainName", "name"),
+    "legal_name_type": ("legalName", "type"),
+    "name_title": ("legalName", "title"),
+    "given_name": ("legalName", "givenName"),
+    "family_name": ("legalName", "familyName"),
+    "state": ("address", "state"),
+    "postcode": ("address", "postcode"),
+    "asic_number": ("asicNumber", "number"),
+    "asic_number_type": ("asicNumber", "type"),
+    "gst_status": ("gst", "status"),
+    "gst_status_date": ("gst", "statusDate"),
+}
+DGR_COLUMNS = ["abn", "status_date", "name_type", "name"]
+OTHER_NAME_COLUMNS = ["abn", "name_type", "name"]
+
+def require_pyarrow():
+    if pa is None:
+        raise RuntimeError("pyarrow is required for the columnar export: pip install pyarrow")
+
+def schema(columns):
+    fields = []
+    for column in columns:
+        if column == "abn":
+            fields.append(pa.field(column, pa.int64()))
+        elif column in CATEGORICAL:
+            fields.append(pa.field(column, pa.dictionary(pa.int32(), pa.string())))
+        elif column in DATES:
+            fields.append(pa.field(column, pa.date32()))
+        else:
+            fields.append(pa.field(column, pa.string()))
+    return pa.schema(fields)
+
+def doc_columns(docs):
+    """Column lists for the entities, dgrs and other_names tables from (abn, doc JSON) pairs."""
+    entities = {column: [] for column in ENTITY_FIELDS}
+    dgrs = {column: [] for column in DGR_COLUMNS}
+    other_names = {column: [] for column in OTHER_NAME_COLUMNS}
+    for abn, doc in docs:
+        doc = json.loads(doc)
+        for column, path in ENTITY_FIELDS.items():
+            value = doc
+            for key in path:
+                value = value.get(key) if value else None
+            entities[column].append(value or None)
+        for dgr in doc["dgrs"]:
+            dgrs["abn"].append(abn)
+            dgrs["status_date"].append(dgr["statusDate"] or None)
+            dgrs["name_type"].append(dgr["type"] or None)
+            dgrs["name"].append(dgr["name"] or None)
+        for other in doc["otherNames"]:
+            other_names["abn"].append(abn)
+            other_names["name_type"].append(other["type"] or None)
+            other_names["name"].append(other["name"] or None)
+    return entities, dgrs, other_names
+
+class Dictionaries:
+    """One growing dictionary per categorical column, shared by every batch, since Arrow IPC can only extend one."""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = {}
+
+    def encode(self, column, values):
+        codes = self.codes.setdefault(column, {})
+        known = self.values.setdefault(column, [])
+        indices = []
+        for value in values:
+            if value is None:
+                indices.append(None)
+                continue
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(known)
+                known.append(value)
+            indices.append(code)
+        return pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()), pa.array(known, pa.string()))
+
+def record_batch(columns, dictionaries):
+    arrays = []
+    for column, values in columns.items():
+        if column == "abn":
+            arrays.append(pc.cast(pa.array(values, pa.string()), pa.int64()))
+        elif column in CATEGORICAL:
+            arrays.append(dictionaries.encode(column, values))
+        elif column in DATES:
+            # YYYYMMDD text; anything unparseable becomes null
+            text = pa.array([value if value and len(value) == 8 and value.isdigit() else None for value in values],
+                            pa.string())
+            arrays.append(pc.cast(pc.strptime(text, format="%Y%m%d", unit="s", error_is_null=True), pa.date32()))
+        else:
+            arrays.append(pa.array(values, pa.string()))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema(columns))
+
+class ColumnarWriter:
+    """Writes entities partitioned by state, plus dgrs and other_names, as Parquet and/or uncompressed Arrow IPC.
+
+    Files go in out_dir/{parquet,arrow}/entities/<STATE>/ and out_dir/{parquet,arrow}/{dgrs,other_names}.*.
+    """
+
+    def __init__(self, out_dir, formats=("parquet", "arrow")):
+        self.out_dir = out_dir
+        self.formats = formats
+        self.dictionaries = Dictionaries()
+        self.writers = {}
+        self.rows = {}
+
+    def writer(self, fmt, table, partition, batch_schema):
+        key = (fmt, table, partition)
+        if key not in self.writers:
+            if partition is None:
+                path = os.path.join(self.out_dir, fmt, f"{table}.{fmt}")
+            else:
+                path = os.path.join(self.out_dir, fmt, table, partition, f"part-0.{fmt}")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if fmt == "parquet":
+                self.writers[key] = pq.ParquetWriter(path, batch_schema, compression="zstd")
+            else:
+                options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+                self.writers[key] = pa.ipc.new_file(path, batch_schema, options=options)
+        return self.writers[key]
+
+    def write(self, table, batch, partition=None):
+        if batch.num_rows == 0:
+            return
+        self.rows[table] = self.rows.get(table, 0) + batch.num_rows
+        for fmt in self.formats:
+            if fmt == "parquet":
+                self.writer(fmt, table, partition, batch.schema).write_table(pa.Table.from_batches([batch]))
+            else:
+                self.writer(fmt, table, partition, batch.schema).write_batch(batch)
+
+    def write_docs(self, docs):
+        entities, dgrs, other_names = doc_columns(docs)
+        batch = record_batch(entities, self.dictionaries)
+        states = batch.column("state").dictionary_decode()
+        for state in pc.unique(states).to_pylist():
+            mask = pc.is_null(states) if state is None else pc.fill_null(pc.equal(states, state), False)
+            self.write("entities", batch.filter(mask), state or "unknown")
+        self.write("dgrs", record_batch(dgrs, self.dictionaries))
+        self.write("other_names", record_batch(other_names, self.dictionaries))
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+
+def export_from_db(db_path, out_dir, formats=("parquet", "arrow"), chunk_size=100000):
+    """Export from the entity_docs table of an existing database."""
+    require_pyarrow()
+    print(f"Exporting {db_path} to {out_dir}...")
+    shutil.rmtree(out_dir, ignore_errors=True)
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    cursor = conn.cursor()
+    writer = ColumnarWriter(out_dir, formats)
+    start = time.perf_counter()
+
+    cursor.execute("SELECT abn, doc FROM entity_docs ORDER BY abn")
+    while True:
+        docs = cursor.fetchmany(chunk_size)
+        if not docs:
+            break
+        writer.write_docs(docs)
+
+    writer.close()
+    conn.close()
+    print(f"Exported {writer.rows} in {time.perf_counter() - start:.1f} s")
+    return writer.rows
+
+def export_from_xml(xml_dir, out_dir, formats=("parquet", "arrow"), batch_size=100000):
+    """Export straight from the parsed record stream, without a database.
+
+    Like the INSERT OR IGNOREs in parse_xml.py, the first record for an ABN wins.
+    """
+    require_pyarrow()
+    print(f"Exporting {xml_dir} to {out_dir}...")
+    shutil.rmtree(out_dir, ignore_errors=True)
+    writer = ColumnarWriter(out_dir, formats)
+    seen = set()
+    start = time.perf_counter()
+
+    for file_path in list_xml_files(xml_dir):
+        for record_count, batch in iter_batches(file_path, batch_size):
+            docs = []
+            for abn, doc in batch["entity_docs"]:
+                if abn not in seen:
+                    seen.add(abn)
+                    docs.append((abn, doc))
+            writer.write_docs(docs)
+
+    writer.close()
+    print(f"Exported {writer.rows} in {time.perf_counter() - start:.1f} s")
+    return writer.rows
+
+def read_table(out_dir, table, fmt="arrow"):
+    """Load an exported table. Arrow files are memory-mapped, so columns are read without copying."""
+    require_pyarrow()
+    path = os.path.join(out_dir, fmt, table)
+    if fmt == "parquet":
+        source = path if os.path.isdir(path) else path + ".parquet"
+        return ds.dataset(source, format="parquet").to_table()
+    if os.path.isdir(path):
+        files = sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+    else:
+        files = [path + ".arrow"]
+    tables = [pa.ipc.open_file(pa.memory_map(file_path, "r")).read_all() for file_path in files]
+    # Partitions were written with dictionaries from one shared Dictionaries, but
+    # unify anyway so the concatenation has a single dictionary per column
+    return pa.concat_tables(tables).unify_dictionaries()
+
+def decoded(table):
+    """table with dictionary columns cast back to strings (sort_by can't sort dictionaries)."""
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(i, field.name, pc.cast(table.column(i), pa.string()))
+    return table
+
+def summarize(out_dir, fmt="arrow"):
+    """The analysts' standard aggregates, computed with Arrow kernels. Returns {name: pyarrow.Table}."""
+    entities = read_table(out_dir, "entities", fmt)
+    dgrs = read_table(out_dir, "dgrs", fmt)
+
+    active = entities.filter(pc.equal(entities.column("status"), "ACT"))
+    results = {}
+    results["active_by_state_type"] = (
+        decoded(active.group_by(["state", "entity_type_text"]).aggregate([("abn", "count")]))
+        .sort_by([("state", "ascending"), ("entity_type_text", "ascending")])
+    )
+    gst = entities.filter(pc.equal(entities.column("gst_status"), "ACT"))
+    gst = gst.append_column("year", pc.year(gst.column("gst_status_date")))
+    results["gst_registrations_by_year"] = gst.group_by("year").aggregate([("abn", "count")]).sort_by("year")
+    # Joins can't carry dictionary columns, so decode state for this one
+    states = pa.table({"abn": entities.column("abn"), "state": pc.cast(entities.column("state"), pa.string())})
+    results["dgrs_by_state"] = (
+        dgrs.select(["abn"]).join(states, "abn").group_by("state").aggregate([("abn", "count")]).sort_by("state")
+    )
+    return results
+
+# The same aggregates against the row store, for comparison
+SUMMARY_SQL = {
+    "active_by_state_type": """
+        SELECT a.state, et.entity_type_text, COUNT(*)
+        FROM abns s
+        JOIN addresses a ON a.abn = s.abn
+        JOIN entity_types et ON et.abn = s.abn
+        WHERE s.status = 'ACT'
+        GROUP BY 1, 2 ORDER BY 1, 2
+    """,
+    "gst_registrations_by_year": """
+        SELECT CAST(substr(status_date, 1, 4) AS INTEGER), COUNT(*)
+        FROM gst_statuses WHERE status = 'ACT'
+        GROUP BY 1 ORDER BY 1
+    """,
+    "dgrs_by_state": """
+        SELECT a.state, COUNT(*)
+        FROM dgrs d JOIN addresses a ON a.abn = d.abn
+        GROUP BY 1 ORDER BY 1
+    """,
+}
+
+def summarize_sql(db_path):
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    results = {name: conn.execute(sql).fetchall() for name, sql in SUMMARY_SQL.items()}
+    conn.close()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Columnar (Parquet / Arrow IPC) export of the ABN registry.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export")
+    export.add_argument("out_dir")
+    source = export.add_mutually_exclusive_group(required=True)
+    source.add_argument("--db", help="export from this database's entity_docs table")
+    source.add_argument("--xml", help="export straight from the XML files in this directory")
+    export.add_argument("--format", choices=["parquet", "arrow", "both"], default="both")
+    summary = commands.add_parser("summary")
+    summary.add_argument("out_dir")
+    summary.add_argument("--format", choices=["parquet", "arrow"], default="arrow")
+    summary.add_argument("--db", help="also time the same aggregates in SQLite")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        formats = ("parquet", "arrow") if args.format == "both" else (args.format,)
+        if args.db:
+            export_from_db(args.db, args.out_dir, formats)
+        else:
+            export_from_xml(args.xml, args.out_dir, formats)
+    else:
+        start = time.perf_counter()
+        for name, table in summarize(args.out_dir, args.format).items():
+            print(f"{name} ({table.num_rows} rows)")
+            for row in table.slice(0, 20).to_pylist():
+                print("  " + "  ".join(str(value) for value in row.values()))
+        print(f"Arrow ({args.format}): {time.perf_counter() - start:.2f} s")
+        if args.db:
+            start = time.perf_counter()
+            summarize_sql(args.db)
+            print(f"SQLite: {time.perf_counter() - start:.2f} s")
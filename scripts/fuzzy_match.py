@@ -0,0 +1,151 @@
+import difflib
+import sqlite3
+import sys
+
+# Legal suffixes and filler words that say nothing about which entity a name is
+NOISE_WORDS = {
+    "pty", "ltd", "limited", "proprietary", "p/l", "pl", "trust", "trustee", "the", "for",
+    "inc", "incorporated", "co", "company", "corporation", "corp", "&", "and",
+}
+
+def normalize_name(name):
+    """Name as produced by clean_name, with punctuation and legal suffixes removed."""
+    words = "".join(c if c.isalnum() or c == "&" else " " for c in (name or "").lower()).split()
+    kept = [word for word in words if word not in NOISE_WORDS]
+    # A name made only of noise words ("the trust") is kept as it is
+    return " ".join(kept or words)
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def scorer(norm):
+    """Similarity to norm, from 0 to 1: trigram Dice overlap blended with difflib's ratio."""
+    query_grams = trigrams(f" {norm} ")
+    matcher = difflib.SequenceMatcher(None, b=norm, autojunk=False)
+
+    def score(candidate):
+        if candidate == norm:
+            return 1.0
+        grams = trigrams(f" {candidate} ")
+        dice = 2 * len(query_grams & grams) / (len(query_grams) + len(grams)) if grams else 0.0
+        matcher.set_seq1(candidate)
+        return 0.5 * dice + 0.5 * matcher.ratio()
+    return score
+
+def create_fuzzy_tables(cursor):
+    # Each distinct normalized name is indexed once; fuzzy_name_map points it
+    # back at the search_names rows it came from. Derived from search_names
+    # ids, so rebuild this after setup_search_index.
+    cursor.execute("DROP TABLE IF EXISTS fuzzy_norms_vocab")
+    cursor.execute("DROP TABLE IF EXISTS fuzzy_norms_fts")
+    cursor.execute("DROP TABLE IF EXISTS fuzzy_name_map")
+    cursor.execute("DROP TABLE IF EXISTS fuzzy_norms")
+    cursor.execute("""
+        CREATE TABLE fuzzy_norms (
+            id INTEGER PRIMARY KEY,
+            norm TEXT UNIQUE
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE fuzzy_name_map (
+            norm_id INTEGER,
+            name_id INTEGER,
+            PRIMARY KEY (norm_id, name_id)
+        ) WITHOUT ROWID
+    """)
+    # Trigrams match inside words, so a typo only breaks the few trigrams around it
+    cursor.execute("""
+        CREATE VIRTUAL TABLE fuzzy_norms_fts USING fts5(
+            norm, content='fuzzy_norms', content_rowid='id', tokenize='trigram', detail='none'
+        )
+    """)
+    cursor.execute("CREATE VIRTUAL TABLE fuzzy_norms_vocab USING fts5vocab(fuzzy_norms_fts, 'row')")
+
+def populate_fuzzy_tables(conn):
+    conn.create_function("normalize_name", 1, normalize_name, deterministic=True)
+    conn.execute("CREATE TEMP TABLE fuzzy_staging AS SELECT id, normalize_name(name) AS norm FROM search_names")
+    conn.execute("INSERT OR IGNORE INTO fuzzy_norms (norm) SELECT norm FROM temp.fuzzy_staging ORDER BY norm")
+    conn.execute("""
+        INSERT INTO fuzzy_name_map (norm_id, name_id)
+        SELECT n.id, s.id FROM temp.fuzzy_staging s JOIN fuzzy_norms n ON n.norm = s.norm
+    """)
+    conn.execute("DROP TABLE temp.fuzzy_staging")
+    conn.execute("INSERT INTO fuzzy_norms_fts(fuzzy_norms_fts) VALUES('rebuild')")
+
+def setup_fuzzy_index(db_path):
+    print(f"Setting up fuzzy name index in {db_path}...")
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    create_fuzzy_tables(cursor)
+    populate_fuzzy_tables(conn)
+
+    conn.commit()
+    print("Fuzzy name index created and populated.")
+    conn.close()
+
+def fuzzy_search(cursor, query, k=10, candidates=200, max_postings=5000):
+    """Top-k (score, abn, name) matches for a possibly misspelled name, best first and one per ABN.
+
+    Candidates come from the rarest query trigrams, up to max_postings postings, and are rescored.
+    """
+    norm = normalize_name(query)
+    if not norm:
+        return []
+
+    # fts5vocab only uses an index for term = ?, not for IN (...)
+    frequencies = []
+    for gram in trigrams(norm):
+        cursor.execute("SELECT doc FROM fuzzy_norms_vocab WHERE term = ?", (gram,))
+        row = cursor.fetchone()
+        # Trigrams nobody has are typos (or spaces around them) and match nothing
+        if row:
+            frequencies.append((row[0], gram))
+    frequencies.sort()
+
+    rare = []
+    postings = 0
+    for docs, gram in frequencies:
+        if rare and postings + docs > max_postings:
+            break
+        rare.append(gram)
+        postings += docs
+    if not rare:
+        return []
+
+    # Names sharing the most of those trigrams, the closest in length first among equals
+    union = " UNION ALL ".join(["SELECT rowid FROM fuzzy_norms_fts WHERE fuzzy_norms_fts MATCH ?"] * len(rare))
+    cursor.execute(f"""
+        SELECT n.id, n.norm
+        FROM (SELECT rowid, COUNT(*) AS hits FROM ({union}) GROUP BY rowid) g
+        JOIN fuzzy_norms n ON n.id = g.rowid
+        ORDER BY g.hits DESC, ABS(LENGTH(n.norm) - ?)
+        LIMIT ?
+    """, ['"' + gram.replace('"', '""') + '"' for gram in rare] + [len(norm), candidates])
+    score = scorer(norm)
+    scored = sorted(((score(candidate), norm_id) for norm_id, candidate in cursor.fetchall()), reverse=True)
+
+    results = []
+    seen = set()
+    for score, norm_id in scored:
+        cursor.execute("""
+            SELECT s.abn, s.name
+            FROM fuzzy_name_map m
+            JOIN search_names s ON s.id = m.name_id
+            WHERE m.norm_id = ?
+            ORDER BY s.abn
+        """, (norm_id,))
+        for abn, name in cursor:
+            if abn not in seen:
+                seen.add(abn)
+                results.append((score, abn, name))
+                if len(results) == k:
+                    return results
+    return results
+
+if __name__ == "__main__":
+    db_path = r"D:\FIRMABLE\db\abn.db"
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    for row in fuzzy_search(conn.cursor(), " ".join(sys.argv[1:]) or "woolworth ltd"):
+        print(row)
+    conn.close()
@@ -1,10 +1,6 @@
 import sqlite3
 
-def add_indexes(db_path):
-    print(f"Adding indexes to {db_path}...")
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
+def create_indexes(cursor):
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_abrs_abn ON abrs(abn)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_abns_abn ON abns(abn)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_entity_types_abn ON entity_types(abn)")
@@ -18,6 +14,13 @@ def add_indexes(db_path):
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_other_entities_abn ON other_entities(abn)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_other_entities_name ON other_entities(name)")
 
+def add_indexes(db_path):
+    print(f"Adding indexes to {db_path}...")
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    create_indexes(cursor)
+
     conn.commit()
     print("Indexes created.")
     conn.close()
@@ -0,0 +1,120 @@
+import cProfile
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def rss_mb():
+    """Current resident set size in MB, or None where it can't be read."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / 2 ** 20
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def max_rss_mb():
+    """Peak resident set size in MB, or None where it can't be read."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Bytes on macOS, KB elsewhere
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+    if psutil is not None and hasattr(psutil.Process().memory_info(), "peak_wset"):
+        return psutil.Process().memory_info().peak_wset / 2 ** 20
+    return None
+
+class IngestMetrics:
+    """Stage timers (parse, extract, write, commit), counters and periodic JSON-lines snapshots for a load.
+
+    Snapshots go to out (a path, file or None for stderr); profile_dir saves a cProfile <file>.prof per file.
+    """
+
+    def __init__(self, out=None, interval=10.0, profile_dir=None):
+        self.out = open(out, "a", encoding="utf-8") if isinstance(out, str) else (out or sys.stderr)
+        self.owns_out = isinstance(out, str)
+        self.interval = interval
+        self.profile_dir = profile_dir
+        self.timers = {}
+        self.counters = {}
+        self.start = self.last_time = time.perf_counter()
+        self.last_records = 0
+        self.file_path = None
+        self.bytes_done = 0
+
+    def add_time(self, stage, seconds):
+        self.timers[stage] = self.timers.get(stage, 0.0) + seconds
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def set(self, name, value):
+        self.counters[name] = value
+
+    def bytes_read(self, position, file_done=False):
+        """Position reached in the current file; earlier files' sizes are added on."""
+        self.set("bytes_read", self.bytes_done + position)
+        if file_done:
+            self.bytes_done += position
+
+    def count_batch(self, batch):
+        for table, rows in batch.items():
+            self.count(f"rows.{table}", len(rows))
+
+    def snapshot(self, event="progress"):
+        now = time.perf_counter()
+        records = self.counters.get("records", 0)
+        since = now - self.last_time
+        line = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "event": event,
+            "file": self.file_path and os.path.basename(self.file_path),
+            "elapsed_s": round(now - self.start, 3),
+            "records_per_s": round((records - self.last_records) / since, 1) if since else None,
+            "rss_mb": rss_mb(),
+            "max_rss_mb": max_rss_mb(),
+            "stages": {stage: round(seconds, 3) for stage, seconds in self.timers.items()},
+            "counters": dict(self.counters),
+        }
+        self.out.write(json.dumps(line) + "\n")
+        self.out.flush()
+        self.last_time = now
+        self.last_records = records
+        return line
+
+    def maybe_snapshot(self):
+        if time.perf_counter() - self.last_time >= self.interval:
+            self.snapshot()
+
+    @contextmanager
+    def file(self, file_path):
+        """Wrap the load of one file: sets the file name, profiles it if enabled, snapshots at the end."""
+        self.file_path = file_path
+        profiler = cProfile.Profile() if self.profile_dir else None
+        if profiler:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+                os.makedirs(self.profile_dir, exist_ok=True)
+                profiler.dump_stats(os.path.join(self.profile_dir, os.path.basename(file_path) + ".prof"))
+            self.snapshot("file_done")
+
+    def close(self):
+        self.file_path = None
+        self.snapshot("done")
+        if self.owns_out:
+            self.out.close()
@@ -0,0 +1,159 @@
+import multiprocessing as mp
+import queue
+import sqlite3
+import time
+import os
+import traceback
+from parse_xml import ensure_abn_indexes, ensure_entity_docs, iter_batches, insert_batch, upsert_batch, list_xml_files
+
+def parse_worker(task_queue, batch_queue, batch_size):
+    """Parse files from task_queue and push row batches onto batch_queue."""
+    while True:
+        file_path = task_queue.get()
+        if file_path is None:
+            break
+        start = time.perf_counter()
+        wait_seconds = 0.0
+        record_count = 0
+        try:
+            for record_count, batch in iter_batches(file_path, batch_size):
+                if not batch["abrs"]:
+                    continue
+                # put() blocks while the queue is full, which is our backpressure
+                put_start = time.perf_counter()
+                batch_queue.put(("batch", file_path, record_count, batch))
+                wait_seconds += time.perf_counter() - put_start
+        except Exception:
+            batch_queue.put(("error", file_path, traceback.format_exc()))
+            continue
+        parse_seconds = time.perf_counter() - start - wait_seconds
+        batch_queue.put(("done", file_path, record_count, parse_seconds, wait_seconds))
+
+def run_parallel_ingest(xml_files, conn, workers=None, batch_size=10000, queue_size=None, commit_each_batch=True, delta=False,
+                        on_change=None):
+    """Parse xml_files in worker processes and write every batch through conn. Returns per-stage stats.
+
+    on_change is called as in parse_and_insert, after the commit (once at the end with commit_each_batch=False).
+    """
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    workers = min(workers, len(xml_files)) or 1
+    queue_size = queue_size or workers * 2
+
+    task_queue = mp.Queue()
+    batch_queue = mp.Queue(maxsize=queue_size)
+    for file_path in xml_files:
+        task_queue.put(file_path)
+    for _ in range(workers):
+        task_queue.put(None)
+
+    processes = [
+        mp.Process(target=parse_worker, args=(task_queue, batch_queue, batch_size), daemon=True)
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    cursor = conn.cursor()
+    stats = {
+        "workers": workers, "files": len(xml_files), "records": 0, "rows_written": 0, "new": 0, "updated": 0,
+        "parse_seconds": 0.0, "worker_wait_seconds": 0.0,
+        "write_seconds": 0.0, "writer_idle_seconds": 0.0, "wall_seconds": 0.0
+    }
+    start = time.perf_counter()
+    files_done = 0
+    # Changed ABNs not yet committed, with commit_each_batch=False
+    pending = set()
+    try:
+        while files_done < len(xml_files):
+            idle_start = time.perf_counter()
+            try:
+                message = batch_queue.get(timeout=5)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    raise RuntimeError("All parse workers exited before finishing their files")
+                continue
+            stats["writer_idle_seconds"] += time.perf_counter() - idle_start
+
+            kind = message[0]
+            if kind == "batch":
+                _, file_path, record_count, batch = message
+                write_start = time.perf_counter()
+                if delta:
+                    new, updated = upsert_batch(cursor, batch)
+                    stats["new"] += len(new)
+                    stats["updated"] += len(updated)
+                    changed = new | updated
+                else:
+                    insert_batch(cursor, batch)
+                    stats["rows_written"] += sum(len(rows) for rows in batch.values())
+                    changed = {row[0] for row in batch["abrs"]}
+                if commit_each_batch:
+                    conn.commit()
+                    if on_change and changed:
+                        on_change(changed)
+                elif on_change:
+                    pending |= changed
+                stats["write_seconds"] += time.perf_counter() - write_start
+                print(f"Inserted batch at {record_count} records in {os.path.basename(file_path)}")
+            elif kind == "done":
+                _, file_path, record_count, parse_seconds, wait_seconds = message
+                files_done += 1
+                stats["records"] += record_count
+                stats["parse_seconds"] += parse_seconds
+                stats["worker_wait_seconds"] += wait_seconds
+                print(f"Completed {file_path}: {record_count} records processed")
+            elif kind == "error":
+                _, file_path, error = message
+                raise RuntimeError(f"Failed to parse {file_path}:\n{error}")
+    finally:
+        for process in processes:
+            if process.is_alive() and files_done < len(xml_files):
+                process.terminate()
+            process.join()
+
+    if commit_each_batch:
+        conn.commit()
+    elif pending:
+        # A cache invalidated before the commit could re-read and keep the old rows
+        conn.commit()
+        on_change(pending)
+    stats["wall_seconds"] = time.perf_counter() - start
+    return stats
+
+def print_report(stats):
+    records = stats["records"]
+
+    def rate(seconds):
+        return records / seconds if seconds else 0.0
+
+    print(f"\nParallel ingest: {records} records from {stats['files']} files with {stats['workers']} workers")
+    print(f"  parse: {stats['parse_seconds']:.1f} worker-s, {rate(stats['parse_seconds']):.0f} records/s per worker, "
+          f"blocked on full queue for {stats['worker_wait_seconds']:.1f} worker-s")
+    print(f"  write: {stats['write_seconds']:.1f} s, {rate(stats['write_seconds']):.0f} records/s, "
+          f"{stats['rows_written']} rows, idle waiting for batches {stats['writer_idle_seconds']:.1f} s")
+    if stats["new"] or stats["updated"]:
+        print(f"  delta: {stats['new']} new ABNs, {stats['updated']} updated ABNs")
+    print(f"  total: {stats['wall_seconds']:.1f} s, {rate(stats['wall_seconds']):.0f} records/s")
+
+def process_all_files_parallel(xml_dir, db_path, workers=None, batch_size=10000, queue_size=None, delta=False,
+                               on_change=None):
+    print(f"Processing all XML files in {xml_dir} in parallel...")
+    sources = list_xml_files(xml_dir)
+    conn = sqlite3.connect(db_path)
+    if delta:
+        ensure_abn_indexes(conn.cursor())
+    ensure_entity_docs(conn.cursor())
+    conn.commit()
+
+    stats = run_parallel_ingest(sources, conn, workers, batch_size, queue_size, delta=delta,
+                                on_change=on_change)
+
+    conn.close()
+    print_report(stats)
+    print("All files processed.")
+    return stats
+
+if __name__ == "__main__":
+    xml_dir = r"D:\FIRMABLE\data\xml"
+    db_path = r"D:\FIRMABLE\db\abn.db"
+    process_all_files_parallel(xml_dir, db_path)
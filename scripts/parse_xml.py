@@ -1,246 +1,660 @@
 from lxml import etree
+from contextlib import ExitStack, contextmanager
 import sqlite3
+import json
+import argparse
+import fnmatch
 import glob
+import gzip
+import hashlib
+import io
 import os
+import sys
+import time
+import zipfile
+from entity_docs import ENTITY_DOC_SQL
+from index_db import create_indexes
+from ingest_metrics import IngestMetrics
+from setup_db import create_entity_docs_table
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 def clean_name(name):
     """Basic cleaning: lowercase, remove extra spaces, handle nulls."""
     if not name:
         return ""
-    return " ".join(name.lower().strip().split())
+    return " ".join(name.lower().split())
 
 def clean_text(text):
     """Clean text fields, handle nulls."""
     return text.strip() if text else ""
 
-def parse_and_insert(file_path, db_path, cursor, conn):
-    print(f"Parsing {file_path}...")
-    record_count = 0
-    batch_size = 10000
-    batch = {
-        "abrs": [], "abns": [], "entity_types": [], "main_entities": [],
-        "legal_entities": [], "addresses": [], "asic_numbers": [],
-        "gst_statuses": [], "dgrs": [], "other_entities": []
+TABLES = [
+    "abrs", "abns", "entity_types", "main_entities", "legal_entities",
+    "addresses", "asic_numbers", "gst_statuses", "dgrs", "other_entities", "entity_docs"
+]
+
+INSERT_SQL = {
+    "abrs": "INSERT OR IGNORE INTO abrs (abn, record_last_updated_date) VALUES (?, ?)",
+    "abns": "INSERT OR IGNORE INTO abns (abn, status, status_date) VALUES (?, ?, ?)",
+    "entity_types": "INSERT OR IGNORE INTO entity_types (abn, entity_type_ind, entity_type_text) VALUES (?, ?, ?)",
+    "main_entities": "INSERT OR IGNORE INTO main_entities (abn, name_type, name) VALUES (?, ?, ?)",
+    "legal_entities": "INSERT OR IGNORE INTO legal_entities (abn, name_type, name_title, given_name, family_name) VALUES (?, ?, ?, ?, ?)",
+    "addresses": "INSERT OR IGNORE INTO addresses (abn, state, postcode) VALUES (?, ?, ?)",
+    "asic_numbers": "INSERT OR IGNORE INTO asic_numbers (abn, asic_number, asic_number_type) VALUES (?, ?, ?)",
+    "gst_statuses": "INSERT OR IGNORE INTO gst_statuses (abn, status, status_date) VALUES (?, ?, ?)",
+    "dgrs": "INSERT OR IGNORE INTO dgrs (abn, status_date, name_type, name) VALUES (?, ?, ?, ?)",
+    "other_entities": "INSERT OR IGNORE INTO other_entities (abn, name_type, name) VALUES (?, ?, ?)",
+    "entity_docs": "INSERT OR IGNORE INTO entity_docs (abn, doc) VALUES (?, ?)",
+}
+
+def new_batch():
+    return {table: [] for table in TABLES}
+
+def first_text(elem, tag):
+    """Text of the first direct child with this tag, like elem.findtext(tag) but without ElementPath."""
+    for child in elem:
+        if child.tag == tag:
+            return child.text or ""
+    return ""
+
+def add_record(batch, elem):
+    """Extract one ABR element into the batch in one pass over its children. Returns False if the ABN is missing."""
+    abn_elem = None
+    entity_type_elem = None
+    main_name_elem = None
+    legal_name_elem = None
+    address_elem = None
+    asic_elem = None
+    gst_elem = None
+    dgr_elems = []
+    other_name_elems = []
+
+    for child in elem:
+        tag = child.tag
+        if tag == "OtherEntity":
+            for name_elem in child:
+                if name_elem.tag == "NonIndividualName":
+                    other_name_elems.append(name_elem)
+        elif tag == "ABN":
+            if abn_elem is None:
+                abn_elem = child
+        elif tag == "EntityType":
+            if entity_type_elem is None:
+                entity_type_elem = child
+        elif tag == "MainEntity" or tag == "LegalEntity":
+            for part in child:
+                part_tag = part.tag
+                if part_tag == "NonIndividualName" and tag == "MainEntity":
+                    if main_name_elem is None:
+                        main_name_elem = part
+                elif part_tag == "IndividualName" and tag == "LegalEntity":
+                    if legal_name_elem is None:
+                        legal_name_elem = part
+                elif part_tag == "BusinessAddress" and address_elem is None:
+                    for details in part:
+                        if details.tag == "AddressDetails":
+                            address_elem = details
+                            break
+        elif tag == "ASICNumber":
+            if asic_elem is None:
+                asic_elem = child
+        elif tag == "GST":
+            if gst_elem is None:
+                gst_elem = child
+        elif tag == "DGR":
+            dgr_elems.append(child)
+
+    # ABR attributes
+    record_last_updated = clean_text(elem.get("recordLastUpdatedDate"))
+
+    # ABN
+    if abn_elem is None:
+        return False
+    abn = clean_text(abn_elem.text)
+
+    # Skip if ABN is missing
+    if not abn:
+        return False
+    status = clean_text(abn_elem.get("status"))
+    status_date = clean_text(abn_elem.get("ABNStatusFromDate"))
+
+    # Entity type
+    entity_type_ind = ""
+    entity_type_text = ""
+    if entity_type_elem is not None:
+        entity_type_ind = clean_text(first_text(entity_type_elem, "EntityTypeInd"))
+        entity_type_text = clean_text(first_text(entity_type_elem, "EntityTypeText"))
+
+    # Main entity (non-individuals)
+    main_name = ""
+    main_name_type = ""
+    if main_name_elem is not None:
+        main_name_type = clean_text(main_name_elem.get("type"))
+        main_name = clean_name(first_text(main_name_elem, "NonIndividualNameText"))
+
+    # Legal entity (individuals)
+    legal_name_type = ""
+    name_title = ""
+    given_name = ""
+    family_name = ""
+    if legal_name_elem is not None:
+        legal_name_type = clean_text(legal_name_elem.get("type"))
+        name_title = clean_text(first_text(legal_name_elem, "NameTitle"))
+        given_name = clean_text(first_text(legal_name_elem, "GivenName"))
+        family_name = clean_text(first_text(legal_name_elem, "FamilyName"))
+
+    # Address
+    state = ""
+    postcode = ""
+    if address_elem is not None:
+        state = clean_text(first_text(address_elem, "State"))
+        postcode = clean_text(first_text(address_elem, "Postcode"))
+
+    # ASIC number
+    asic_number = ""
+    asic_number_type = ""
+    if asic_elem is not None:
+        asic_number = clean_text(asic_elem.text)
+        asic_number_type = clean_text(asic_elem.get("ASICNumberType"))
+
+    # GST status
+    gst_status = ""
+    gst_status_date = ""
+    if gst_elem is not None:
+        gst_status = clean_text(gst_elem.get("status"))
+        gst_status_date = clean_text(gst_elem.get("GSTStatusFromDate"))
+
+    # DGR funds
+    dgrs = []
+    for dgr_elem in dgr_elems:
+        dgr_status_date = clean_text(dgr_elem.get("DGRStatusFromDate"))
+        dgr_name_type = ""
+        dgr_name = ""
+        for dgr_name_elem in dgr_elem:
+            if dgr_name_elem.tag == "NonIndividualName":
+                dgr_name_type = clean_text(dgr_name_elem.get("type"))
+                dgr_name = clean_name(first_text(dgr_name_elem, "NonIndividualNameText"))
+                break
+        if dgr_status_date or dgr_name:
+            dgrs.append((dgr_status_date, dgr_name_type, dgr_name))
+
+    # Other entities
+    other_entities = []
+    for other_elem in other_name_elems:
+        name_type = clean_text(other_elem.get("type"))
+        name_text = clean_name(first_text(other_elem, "NonIndividualNameText"))
+        if name_type and name_text:
+            other_entities.append((name_type, name_text))
+
+    # Add to batch
+    batch["abrs"].append((abn, record_last_updated))
+    batch["abns"].append((abn, status, status_date))
+    batch["entity_types"].append((abn, entity_type_ind, entity_type_text))
+    if main_name:
+        batch["main_entities"].append((abn, main_name_type, main_name))
+    if given_name or family_name:
+        batch["legal_entities"].append((abn, legal_name_type, name_title, given_name, family_name))
+    if state or postcode:
+        batch["addresses"].append((abn, state, postcode))
+    if asic_number:
+        batch["asic_numbers"].append((abn, asic_number, asic_number_type))
+    if gst_status:
+        batch["gst_statuses"].append((abn, gst_status, gst_status_date))
+    for dgr_status_date, dgr_name_type, dgr_name in dgrs:
+        batch["dgrs"].append((abn, dgr_status_date, dgr_name_type, dgr_name))
+    for name_type, name in other_entities:
+        batch["other_entities"].append((abn, name_type, name))
+
+    # Entity document, in the shape the details route returns
+    doc = {
+        "abn": abn,
+        "status": status,
+        "statusDate": status_date,
+        "lastUpdated": record_last_updated,
+        "entityTypeInd": entity_type_ind or None,
+        "entityTypeText": entity_type_text or None,
+        "mainName": {"name": main_name, "type": main_name_type} if main_name else None,
+        "legalName": {
+            "title": name_title, "givenName": given_name, "familyName": family_name, "type": legal_name_type
+        } if given_name or family_name else None,
+        "address": {"state": state, "postcode": postcode} if state or postcode else None,
+        "asicNumber": {"number": asic_number, "type": asic_number_type} if asic_number else None,
+        "gst": {"status": gst_status, "statusDate": gst_status_date} if gst_status else None,
+        "dgrs": [{"statusDate": d[0], "name": d[2], "type": d[1]} for d in dgrs],
+        "otherNames": [{"name": name, "type": name_type} for name_type, name in other_entities],
     }
+    batch["entity_docs"].append((abn, json.dumps(doc, separators=(",", ":"), ensure_ascii=False)))
+    return True
 
-    # Iterative parsing
-    context = etree.iterparse(file_path, events=("end",), tag="ABR")
-    for event, elem in context:
-        record_count += 1
-        if record_count % 10000 == 0:
-            print(f"Processed {record_count} records in {os.path.basename(file_path)}")
+def ensure_entity_docs(cursor):
+    """Create entity_docs in a database set up before it existed, backfilling it if the ABN indexes are there."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'entity_docs'")
+    if cursor.fetchone():
+        return
+    create_entity_docs_table(cursor)
+    cursor.execute("SELECT 1 FROM abrs LIMIT 1")
+    if not cursor.fetchone():
+        return
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_other_entities_abn'")
+    if cursor.fetchone():
+        print("Building entity_docs for the ABNs already loaded...")
+        cursor.execute(f"INSERT INTO entity_docs (abn, doc) {ENTITY_DOC_SQL}")
+    else:
+        print("Created entity_docs; run entity_docs.py after index_db.py to add documents for earlier loads")
 
-        # ABR attributes
-        record_last_updated = clean_text(elem.get("recordLastUpdatedDate"))
+def ensure_abn_indexes(cursor):
+    """Create the idx_*_abn indexes upsert_batch needs if index_db.py hasn't been run yet."""
+    names = [f"idx_{table}_abn" for table in TABLES if table != "entity_docs"]
+    cursor.execute(f"SELECT name FROM sqlite_master WHERE type = 'index' AND name IN ({', '.join('?' * len(names))})",
+                   names)
+    missing = set(names) - {name for name, in cursor.fetchall()}
+    if missing:
+        print(f"Delta load needs the ABN indexes; creating {', '.join(sorted(missing))}...")
+        create_indexes(cursor)
 
-        # ABN
-        abn_elem = elem.find(".//ABN")
-        abn = clean_text(abn_elem.text) if abn_elem is not None else ""
-        status = clean_text(abn_elem.get("status")) if abn_elem is not None else ""
-        status_date = clean_text(abn_elem.get("ABNStatusFromDate")) if abn_elem is not None else ""
+def insert_batch(cursor, batch):
+    for table in TABLES:
+        cursor.executemany(INSERT_SQL[table], batch[table])
 
-        # Skip if ABN is missing
-        if not abn:
-            continue
+def changed_abns(cursor, batch):
+    """Split the batch's ABNs into (new, updated) against abrs.record_last_updated_date.
 
-        # Entity type
-        entity_type_ind = clean_text(elem.findtext(".//EntityType/EntityTypeInd") or "")
-        entity_type_text = clean_text(elem.findtext(".//EntityType/EntityTypeText") or "")
-
-        # Main entity (non-individuals)
-        main_name = ""
-        main_name_type = ""
-        main_name_elem = elem.find(".//MainEntity/NonIndividualName")
-        if main_name_elem is not None:
-            main_name_type = clean_text(main_name_elem.get("type"))
-            main_name = clean_name(main_name_elem.findtext("NonIndividualNameText") or "")
-
-        # Legal entity (individuals)
-        legal_name_type = ""
-        name_title = ""
-        given_name = ""
-        family_name = ""
-        legal_name_elem = elem.find(".//LegalEntity/IndividualName")
-        if legal_name_elem is not None:
-            legal_name_type = clean_text(legal_name_elem.get("type"))
-            name_title = clean_text(legal_name_elem.findtext("NameTitle") or "")
-            given_name = clean_text(legal_name_elem.findtext("GivenName") or "")
-            family_name = clean_text(legal_name_elem.findtext("FamilyName") or "")
-
-        # Address
-        state = clean_text(elem.findtext(".//BusinessAddress/AddressDetails/State") or "")
-        postcode = clean_text(elem.findtext(".//BusinessAddress/AddressDetails/Postcode") or "")
-
-        # ASIC number
-        asic_number = ""
-        asic_number_type = ""
-        asic_elem = elem.find(".//ASICNumber")
-        if asic_elem is not None:
-            asic_number = clean_text(asic_elem.text or "")
-            asic_number_type = clean_text(asic_elem.get("ASICNumberType") or "")
-
-        # GST status
-        gst_status = ""
-        gst_status_date = ""
-        gst_elem = elem.find(".//GST")
-        if gst_elem is not None:
-            gst_status = clean_text(gst_elem.get("status") or "")
-            gst_status_date = clean_text(gst_elem.get("GSTStatusFromDate") or "")
-
-        # DGR funds
-        dgrs = []
-        for dgr_elem in elem.findall(".//DGR"):
-            dgr_status_date = clean_text(dgr_elem.get("DGRStatusFromDate") or "")
-            dgr_name_elem = dgr_elem.find("NonIndividualName")
-            dgr_name_type = clean_text(dgr_name_elem.get("type") or "") if dgr_name_elem is not None else ""
-            dgr_name = clean_name(dgr_name_elem.findtext("NonIndividualNameText") or "") if dgr_name_elem is not None else ""
-            if dgr_status_date or dgr_name:
-                dgrs.append((dgr_status_date, dgr_name_type, dgr_name))
-
-        # Other entities
-        other_entities = []
-        for other_elem in elem.findall(".//OtherEntity/NonIndividualName"):
-            name_type = clean_text(other_elem.get("type") or "")
-            name_text = clean_name(other_elem.findtext("NonIndividualNameText") or "")
-            if name_type and name_text:
-                other_entities.append((name_type, name_text))
-
-        # Add to batch
-        batch["abrs"].append((abn, record_last_updated))
-        batch["abns"].append((abn, status, status_date))
-        batch["entity_types"].append((abn, entity_type_ind, entity_type_text))
-        if main_name:
-            batch["main_entities"].append((abn, main_name_type, main_name))
-        if given_name or family_name:
-            batch["legal_entities"].append((abn, legal_name_type, name_title, given_name, family_name))
-        if state or postcode:
-            batch["addresses"].append((abn, state, postcode))
-        if asic_number:
-            batch["asic_numbers"].append((abn, asic_number, asic_number_type))
-        if gst_status:
-            batch["gst_statuses"].append((abn, gst_status, gst_status_date))
-        for dgr_status_date, dgr_name_type, dgr_name in dgrs:
-            batch["dgrs"].append((abn, dgr_status_date, dgr_name_type, dgr_name))
-        for name_type, name in other_entities:
-            batch["other_entities"].append((abn, name_type, name))
-
-        # Insert batch every batch_size records
-        if record_count % batch_size == 0:
-            cursor.executemany(
-                "INSERT OR IGNORE INTO abrs (abn, record_last_updated_date) VALUES (?, ?)",
-                batch["abrs"]
-            )
-            cursor.executemany(
-                "INSERT OR IGNORE INTO abns (abn, status, status_date) VALUES (?, ?, ?)",
-                batch["abns"]
-            )
-            cursor.executemany(
-                "INSERT OR IGNORE INTO entity_types (abn, entity_type_ind, entity_type_text) VALUES (?, ?, ?)",
-                batch["entity_types"]
-            )
-            cursor.executemany(
-                "INSERT OR IGNORE INTO main_entities (abn, name_type, name) VALUES (?, ?, ?)",
-                batch["main_entities"]
-            )
-            cursor.executemany(
-                "INSERT OR IGNORE INTO legal_entities (abn, name_type, name_title, given_name, family_name) VALUES (?, ?, ?, ?, ?)",
-                batch["legal_entities"]
-            )
-            cursor.executemany(
-                "INSERT OR IGNORE INTO addresses (abn, state, postcode) VALUES (?, ?, ?)",
-                batch["addresses"]
-            )
-            cursor.executemany(
-                "INSERT OR IGNORE INTO asic_numbers (abn, asic_number, asic_number_type) VALUES (?, ?, ?)",
-                batch["asic_numbers"]
-            )
-            cursor.executemany(
-                "INSERT OR IGNORE INTO gst_statuses (abn, status, status_date) VALUES (?, ?, ?)",
-                batch["gst_statuses"]
-            )
-            cursor.executemany(
-                "INSERT OR IGNORE INTO dgrs (abn, status_date, name_type, name) VALUES (?, ?, ?, ?)",
-                batch["dgrs"]
-            )
-            cursor.executemany(
-                "INSERT OR IGNORE INTO other_entities (abn, name_type, name) VALUES (?, ?, ?)",
-                batch["other_entities"]
-            )
-            conn.commit()
-            batch = {
-                "abrs": [], "abns": [], "entity_types": [], "main_entities": [],
-                "legal_entities": [], "addresses": [], "asic_numbers": [],
-                "gst_statuses": [], "dgrs": [], "other_entities": []
-            }
-            print(f"Inserted batch at {record_count} records in {os.path.basename(file_path)}")
+    ABNs whose stored date is the same or newer are left out of both sets.
+    """
+    incoming = dict(batch["abrs"])
+    existing = {}
+    abns = list(incoming)
+    for i in range(0, len(abns), 500):
+        chunk = abns[i:i + 500]
+        placeholders = ",".join("?" * len(chunk))
+        cursor.execute(f"SELECT abn, record_last_updated_date FROM abrs WHERE abn IN ({placeholders})", chunk)
+        existing.update(cursor.fetchall())
 
-        # Clear element to free memory
-        elem.clear()
-        while elem.getprevious() is not None:
-            del elem.getparent()[0]
+    new = {abn for abn in incoming if abn not in existing}
+    updated = {abn for abn in existing if incoming[abn] > (existing[abn] or "")}
+    return new, updated
 
-    # Insert remaining records
-    if batch["abrs"]:
-        cursor.executemany(
-            "INSERT OR IGNORE INTO abrs (abn, record_last_updated_date) VALUES (?, ?)",
-            batch["abrs"]
-        )
-        cursor.executemany(
-            "INSERT OR IGNORE INTO abns (abn, status, status_date) VALUES (?, ?, ?)",
-            batch["abns"]
-        )
-        cursor.executemany(
-            "INSERT OR IGNORE INTO entity_types (abn, entity_type_ind, entity_type_text) VALUES (?, ?, ?)",
-            batch["entity_types"]
-        )
-        cursor.executemany(
-            "INSERT OR IGNORE INTO main_entities (abn, name_type, name) VALUES (?, ?, ?)",
-            batch["main_entities"]
-        )
-        cursor.executemany(
-            "INSERT OR IGNORE INTO legal_entities (abn, name_type, name_title, given_name, family_name) VALUES (?, ?, ?, ?, ?)",
-            batch["legal_entities"]
-        )
-        cursor.executemany(
-            "INSERT OR IGNORE INTO addresses (abn, state, postcode) VALUES (?, ?, ?)",
-            batch["addresses"]
-        )
-        cursor.executemany(
-            "INSERT OR IGNORE INTO asic_numbers (abn, asic_number, asic_number_type) VALUES (?, ?, ?)",
-            batch["asic_numbers"]
-        )
-        cursor.executemany(
-            "INSERT OR IGNORE INTO gst_statuses (abn, status, status_date) VALUES (?, ?, ?)",
-            batch["gst_statuses"]
-        )
-        cursor.executemany(
-            "INSERT OR IGNORE INTO dgrs (abn, status_date, name_type, name) VALUES (?, ?, ?, ?)",
-            batch["dgrs"]
-        )
-        cursor.executemany(
-            "INSERT OR IGNORE INTO other_entities (abn, name_type, name) VALUES (?, ?, ?)",
-            batch["other_entities"]
+def upsert_batch(cursor, batch):
+    """Insert new ABNs and replace every row of updated ABNs. Returns (new, updated). Needs the idx_*_abn indexes."""
+    new, updated = changed_abns(cursor, batch)
+    if updated:
+        keys = [(abn,) for abn in updated]
+        for table in TABLES:
+            cursor.executemany(f"DELETE FROM {table} WHERE abn = ?", keys)
+    changed = new | updated
+    if changed:
+        insert_batch(cursor, {table: [row for row in rows if row[0] in changed] for table, rows in batch.items()})
+    return new, updated
+
+# Any release: 20250409_Public01.xml, 20250416_Public01.xml, ...
+XML_PATTERN = "*_Public*.xml"
+# Reads from files, archives, decompressors and stdin are done this many bytes at a time
+READ_SIZE = 1 << 20
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+ZIP_MAGIC = b"PK\x03\x04"
+
+class CountingReader:
+    """Read-only wrapper that counts bytes read, so tell() also works on pipes and decompressors."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.position = 0
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.position += len(data)
+        return data
+
+    def tell(self):
+        return self.position
+
+def split_member(source):
+    """("archive.zip", "member") for an archive member source, else (source, None)."""
+    archive_path, sep, member = source.partition(".zip!")
+    return (archive_path + ".zip", member) if sep else (source, None)
+
+@contextmanager
+def open_source(source):
+    """Binary stream of an .xml, .gz or .zst file, an "archive.zip!member" or "-" (stdin), decompressed as read."""
+    with ExitStack() as stack:
+        archive_path, member = split_member(source)
+        if member:
+            archive = stack.enter_context(zipfile.ZipFile(archive_path))
+            stream = io.BufferedReader(stack.enter_context(archive.open(member)), READ_SIZE)
+        else:
+            if source == "-":
+                f = stack.enter_context(open(sys.stdin.fileno(), "rb", buffering=READ_SIZE, closefd=False))
+            else:
+                f = stack.enter_context(open(source, "rb", buffering=READ_SIZE))
+            magic = f.peek(4)[:4]
+            if magic.startswith(GZIP_MAGIC):
+                stream = io.BufferedReader(stack.enter_context(gzip.GzipFile(fileobj=f)), READ_SIZE)
+            elif magic == ZSTD_MAGIC:
+                if zstandard is None:
+                    raise RuntimeError(f"zstandard is required to read {source}: pip install zstandard")
+                reader = zstandard.ZstdDecompressor().stream_reader(f, read_size=READ_SIZE)
+                stream = io.BufferedReader(stack.enter_context(reader), READ_SIZE)
+            elif magic == ZIP_MAGIC:
+                # The member directory is at the end, so a zip can't be read front to back
+                raise ValueError(f"{source} is a zip archive; pass its path rather than piping it in")
+            else:
+                stream = f
+        yield CountingReader(stream)
+
+def source_hash(source):
+    """Fingerprint of source for checkpoints, or None for stdin, which can't be resumed."""
+    if source == "-":
+        return None
+    archive_path, member = split_member(source)
+    if member:
+        with zipfile.ZipFile(archive_path) as archive:
+            info = archive.getinfo(member)
+        return f"{info.file_size}:{info.CRC:08x}"
+    return file_hash(source)
+
+def iter_batches(file_path, batch_size=10000, metrics=None, skip=0):
+    """Parse a source and yield (record_count, batch) every batch_size records, after skipping `skip` records."""
+    record_count = 0
+    batch = new_batch()
+
+    with open_source(file_path) as source:
+        # Iterative parsing
+        context = etree.iterparse(source, events=("end",), tag="ABR")
+        mark = time.perf_counter()
+        for event, elem in context:
+            record_count += 1
+            if record_count % 10000 == 0:
+                print(f"Processed {record_count} records in {os.path.basename(file_path)}")
+
+            if record_count <= skip:
+                pass  # committed before a restart
+            elif metrics:
+                extract_start = time.perf_counter()
+                metrics.add_time("parse", extract_start - mark)
+                if not add_record(batch, elem):
+                    metrics.count("skipped_no_abn")
+                mark = time.perf_counter()
+                metrics.add_time("extract", mark - extract_start)
+            else:
+                add_record(batch, elem)
+
+            if record_count % batch_size == 0 and record_count > skip:
+                if metrics:
+                    metrics.count("records", batch_size)
+                    metrics.bytes_read(source.tell())
+                yield record_count, batch
+                batch = new_batch()
+                mark = time.perf_counter()
+
+            # Clear element to free memory
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+
+        if metrics:
+            metrics.add_time("parse", time.perf_counter() - mark)
+            metrics.count("records", record_count % batch_size if record_count > skip else 0)
+            metrics.bytes_read(source.tell(), file_done=True)
+
+    # Remaining records
+    yield record_count, batch
+
+def create_progress_table(cursor):
+    """Checkpoints for resumable loads: records committed per file, and whether the file is done."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ingest_progress (
+            file_name TEXT PRIMARY KEY,
+            file_hash TEXT NOT NULL,
+            records_done INTEGER NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT NOT NULL
         )
+    """)
+
+def file_hash(file_path, sample=1 << 20):
+    """Size plus a SHA-1 of the first and last `sample` bytes, to spot an extract replaced since its checkpoint."""
+    size = os.path.getsize(file_path)
+    digest = hashlib.sha1(str(size).encode())
+    with open(file_path, "rb") as f:
+        digest.update(f.read(sample))
+        if size > sample:
+            f.seek(max(sample, size - sample))
+            digest.update(f.read())
+    return f"{size}:{digest.hexdigest()}"
+
+def load_progress(cursor, file_path, digest):
+    """(records_done, completed) for file_path, or (0, False) if there's no checkpoint for this version of it."""
+    cursor.execute("SELECT file_hash, records_done, completed FROM ingest_progress WHERE file_name = ?",
+                   (os.path.basename(file_path),))
+    row = cursor.fetchone()
+    if not row or row[0] != digest:
+        return 0, False
+    return row[1], bool(row[2])
+
+def save_progress(cursor, file_path, digest, records_done, completed=False):
+    """Record a checkpoint; call before the commit of the batch it covers so both land together."""
+    cursor.execute(
+        "INSERT OR REPLACE INTO ingest_progress (file_name, file_hash, records_done, completed, updated_at) "
+        "VALUES (?, ?, ?, ?, datetime('now'))",
+        (os.path.basename(file_path), digest, records_done, int(completed))
+    )
+
+def parse_and_insert(file_path, db_path, cursor, conn, delta=False, on_change=None, metrics=None, checkpoint=False):
+    """Load one file. With delta=True only new or changed ABNs are written.
+
+    on_change gets the ABNs of each commit (empty for progress-only commits); checkpoint resumes from ingest_progress.
+    """
+    print(f"Parsing {file_path}...")
+    record_count = 0
+    batch_size = 10000
+    new_count = 0
+    updated_count = 0
+    skip = 0
+
+    digest = source_hash(file_path) if checkpoint else None
+    if digest:
+        skip, completed = load_progress(cursor, file_path, digest)
+        if completed:
+            print(f"Skipping {file_path}: already loaded ({skip} records)")
+            return
+        if skip:
+            print(f"Resuming {file_path} after {skip} committed records")
+
+    for record_count, batch in iter_batches(file_path, batch_size, metrics, skip):
+        if not batch["abrs"]:
+            continue
+        write_start = time.perf_counter()
+        if delta:
+            new, updated = upsert_batch(cursor, batch)
+            new_count += len(new)
+            updated_count += len(updated)
+            changed = new | updated
+        else:
+            insert_batch(cursor, batch)
+            changed = {row[0] for row in batch["abrs"]}
+        if digest:
+            save_progress(cursor, file_path, digest, record_count)
+        commit_start = time.perf_counter()
+        conn.commit()
+        if metrics:
+            metrics.add_time("write", commit_start - write_start)
+            metrics.add_time("commit", time.perf_counter() - commit_start)
+            metrics.count_batch(batch)
+            metrics.maybe_snapshot()
+        if on_change:
+            on_change(changed)
+        if record_count % batch_size == 0:
+            print(f"Inserted batch at {record_count} records in {os.path.basename(file_path)}")
+
+    if digest:
+        save_progress(cursor, file_path, digest, record_count, completed=True)
         conn.commit()
+        if on_change:
+            on_change(set())
+
+    if delta:
+        print(f"Completed {file_path}: {record_count} records processed, {new_count} new, {updated_count} updated")
+    else:
+        print(f"Completed {file_path}: {record_count} records processed")
+
+def load_codes(cursor):
+    cursor.execute("SELECT kind, value, code FROM codes")
+    return {(kind, value): code for kind, value, code in cursor.fetchall()}
+
+def insert_compact_batch(cursor, batch, codes):
+    """Write a batch into the compact schema, extending the load_codes cache. The first record for an ABN wins."""
+    def code(kind, value):
+        if not value:
+            return None
+        key = (kind, value)
+        if key not in codes:
+            cursor.execute("INSERT INTO codes (kind, value) VALUES (?, ?)", key)
+            codes[key] = cursor.lastrowid
+        return codes[key]
+
+    def number(value):
+        # YYYYMMDD dates and ABNs; anything unexpected is kept as text
+        if not value:
+            return None
+        return int(value) if value.isdigit() else value
+
+    entities = {}
+    for abn, record_last_updated in batch["abrs"]:
+        if abn not in entities:
+            entities[abn] = [number(abn), number(record_last_updated)] + [None] * 16
+
+    def fill(abn, offset, values):
+        row = entities[abn]
+        if row[offset] is None:
+            row[offset:offset + len(values)] = values
+
+    for abn, status, status_date in batch["abns"]:
+        fill(abn, 2, [code("status", status), number(status_date)])
+    for abn, entity_type_ind, entity_type_text in batch["entity_types"]:
+        fill(abn, 4, [code("entity_type_ind", entity_type_ind), code("entity_type_text", entity_type_text)])
+    for abn, name_type, name in batch["main_entities"]:
+        fill(abn, 7, [name])
+        fill(abn, 6, [code("name_type", name_type)])
+    for abn, name_type, name_title, given_name, family_name in batch["legal_entities"]:
+        fill(abn, 8, [code("name_type", name_type), code("name_title", name_title), given_name, family_name])
+    for abn, state, postcode in batch["addresses"]:
+        fill(abn, 12, [code("state", state), postcode])
+    for abn, asic_number, asic_number_type in batch["asic_numbers"]:
+        fill(abn, 14, [asic_number, code("asic_number_type", asic_number_type)])
+    for abn, status, status_date in batch["gst_statuses"]:
+        fill(abn, 16, [code("status", status), number(status_date)])
+
+    dgrs = []
+    seq = {}
+    for abn, status_date, name_type, name in batch["dgrs"]:
+        seq[abn] = seq.get(abn, -1) + 1
+        dgrs.append((number(abn), seq[abn], number(status_date), code("name_type", name_type), name))
+    other_names = []
+    seq = {}
+    for abn, name_type, name in batch["other_entities"]:
+        seq[abn] = seq.get(abn, -1) + 1
+        other_names.append((number(abn), seq[abn], code("name_type", name_type), name))
 
-    print(f"Completed {file_path}: {record_count} records processed")
+    cursor.executemany(f"INSERT OR IGNORE INTO entities VALUES ({','.join('?' * 18)})", entities.values())
+    cursor.executemany("INSERT OR IGNORE INTO entity_dgrs VALUES (?, ?, ?, ?, ?)", dgrs)
+    cursor.executemany("INSERT OR IGNORE INTO entity_other_names VALUES (?, ?, ?, ?)", other_names)
 
-def process_all_files(xml_dir, db_path):
+def list_xml_files(xml_dir):
+    """The sources to load, in order: extract files (plain, .gz, .zst), "archive.zip!member"s or "-".
+
+    Raises FileNotFoundError if there is nothing to load.
+    """
+    if xml_dir == "-":
+        return ["-"]
+    if os.path.isdir(xml_dir):
+        paths = []
+        for pattern in (XML_PATTERN, XML_PATTERN + ".gz", XML_PATTERN + ".zst", "*.zip"):
+            paths.extend(glob.glob(os.path.join(xml_dir, pattern)))
+    elif os.path.exists(xml_dir):
+        paths = [xml_dir]
+    else:
+        raise FileNotFoundError(f"{xml_dir} does not exist")
+
+    sources = []
+    for path in paths:
+        if path.endswith(".zip"):
+            with zipfile.ZipFile(path) as archive:
+                sources.extend(f"{path}!{name}" for name in archive.namelist()
+                               if fnmatch.fnmatch(os.path.basename(name), XML_PATTERN))
+        else:
+            sources.append(path)
+    if not sources:
+        raise FileNotFoundError(f"No {XML_PATTERN} extract files (plain, .gz, .zst or in a .zip) in {xml_dir}")
+    # Process in order (release date, then 01 to 20), whichever archive or compressed file each is in
+    sources.sort(key=lambda source: os.path.basename(split_member(source)[1] or source))
+    return sources
+
+def process_all_files(xml_dir, db_path, delta=False, on_change=None, metrics=None, checkpoint=True):
+    """Load every extract file in xml_dir. See parse_and_insert for the options."""
     print(f"Processing all XML files in {xml_dir}...")
+    sources = list_xml_files(xml_dir)
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
+    if delta:
+        ensure_abn_indexes(cursor)
+    ensure_entity_docs(cursor)
+    if checkpoint:
+        create_progress_table(cursor)
+    conn.commit()
+
+    for file_path in sources:
+        if metrics:
+            with metrics.file(file_path):
+                parse_and_insert(file_path, db_path, cursor, conn, delta, on_change, metrics, checkpoint)
+        else:
+            parse_and_insert(file_path, db_path, cursor, conn, delta, on_change, checkpoint=checkpoint)
+    if metrics:
+        metrics.close()
+
+    conn.close()
+    print("All files processed.")
 
-    # Get all XML files
-    xml_files = glob.glob(os.path.join(xml_dir, "20250409_Public*.xml"))
-    xml_files.sort()  # Process in order (01 to 20)
+def process_all_files_compact(xml_dir, db_path):
+    """Load the XML files into a database created by setup_compact_db.py."""
+    print(f"Processing all XML files in {xml_dir} into compact schema...")
+    sources = list_xml_files(xml_dir)
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    codes = load_codes(cursor)
 
-    for file_path in xml_files:
-        parse_and_insert(file_path, db_path, cursor, conn)
+    for file_path in sources:
+        print(f"Parsing {file_path}...")
+        record_count = 0
+        for record_count, batch in iter_batches(file_path):
+            insert_compact_batch(cursor, batch, codes)
+            conn.commit()
+        print(f"Completed {file_path}: {record_count} records processed")
 
     conn.close()
     print("All files processed.")
 
 if __name__ == "__main__":
-    xml_dir = r"D:\FIRMABLE\data\xml"
-    db_path = r"D:\FIRMABLE\db\abn.db"
-    process_all_files(xml_dir, db_path)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Load the ABR bulk extract into SQLite.")
+    parser.add_argument("xml_dir", nargs="?", default=r"D:\FIRMABLE\data\xml",
+                        help="directory of extract files or zip archives, a single file or archive, or - for stdin")
+    parser.add_argument("db_path", nargs="?", default=r"D:\FIRMABLE\db\abn.db")
+    parser.add_argument("--delta", action="store_true", help="only write new or changed ABNs")
+    parser.add_argument("--compact", action="store_true",
+                        help="load into a database created by setup_compact_db.py")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="append stage timings and throughput snapshots to PATH (JSON lines)")
+    parser.add_argument("--profile", metavar="DIR", help="run each file under cProfile and save <file>.prof in DIR")
+    args = parser.parse_args()
+    if args.compact and (args.delta or args.metrics or args.profile):
+        parser.error("--delta, --metrics and --profile are not supported with --compact")
+    if args.compact:
+        process_all_files_compact(args.xml_dir, args.db_path)
+    else:
+        # --profile alone still reports the metrics, on stderr
+        metrics = IngestMetrics(args.metrics, profile_dir=args.profile) if args.metrics or args.profile else None
+        process_all_files(args.xml_dir, args.db_path, args.delta, metrics=metrics)
\ No newline at end of file
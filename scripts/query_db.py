@@ -0,0 +1,231 @@
+import base64
+import json
+import sqlite3
+import unicodedata
+from setup_search_index import state_partition
+
+# Entity type dropdown values in the frontend, mapped to entity_type_text
+ENTITY_TYPES = {
+    "Company": "Australian Private Company",
+    "Sole Trader": "Individual/Sole Trader",
+    "Partnership": "Partnership",
+}
+
+def connect_readonly(db_path):
+    return sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+def fts_prefix_query(query):
+    """Quote the user's text as one FTS5 phrase whose last token is a prefix (the * goes outside the quotes)."""
+    return '"' + query.lower().replace('"', '""') + '" *'
+
+def fts_phrase(value):
+    return '"' + value.lower().replace('"', '""') + '"'
+
+def name_search_sql(query, state="", entity_type="", method="columns", with_keys=False):
+    """SQL and parameters shared by the name search and its counts. method: "columns", "partitions" or "post_filter"."""
+    match = f"name : ({fts_prefix_query(query)})"
+    params = []
+    table = state_partition(state) if method == "partitions" else None
+    if method == "partitions" and not table:
+        # No state filter, or one that can't name a partition
+        method = "columns"
+    if table:
+        keys = ", f.rowid AS id, f.rank" if with_keys else ""
+        sql = f"""
+            SELECT f.abn, f.name, s.state, f.postcode{keys}
+            FROM {table} f
+            JOIN search_names s ON s.id = f.rowid
+            WHERE {table} MATCH ?
+        """
+        params.append(fts_prefix_query(query))
+        state = ""
+    else:
+        if method == "columns":
+            # Filters become extra FTS terms; the equality checks below only
+            # run on rows that already matched all of them
+            if state:
+                match += f" AND state : {fts_phrase(state)}"
+            if entity_type:
+                match += f" AND entity_type_text : ^ {fts_phrase(entity_type)}"
+        keys = ", rowid AS id, rank" if with_keys else ""
+        sql = f"""
+            SELECT abn, name, state, postcode{keys}
+            FROM search_names_fts
+            WHERE search_names_fts MATCH ?
+        """
+        params.append(match)
+    if state:
+        sql += " AND state = ?"
+        params.append(state)
+    if entity_type:
+        sql += " AND entity_type_text = ?"
+        params.append(entity_type)
+    return sql, params
+
+def partition_exists(cursor, state):
+    """Whether create_state_partitions built an index for state."""
+    table = state_partition(state)
+    if not table:
+        return False
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    return cursor.fetchone() is not None
+
+def search_method(cursor, state, method):
+    """method, or "columns" when "partitions" is asked for a state without a partition index."""
+    if method == "partitions" and not partition_exists(cursor, state):
+        return "columns"
+    return method
+
+def search_names(cursor, query, state="", entity_type="", limit=10, offset=0, method="columns"):
+    """Name search over the search_names projection from setup_search_index.py.
+
+    Returns a page of (abn, name, state, postcode) rows in rank order.
+    """
+    sql, params = name_search_sql(query, state, entity_type, search_method(cursor, state, method))
+    cursor.execute(sql + " ORDER BY rank LIMIT ? OFFSET ?", params + [limit, offset])
+    return cursor.fetchall()
+
+def encode_page_token(order, key, search):
+    payload = json.dumps({"order": order, "key": key, "search": search}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_page_token(token, order, search):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except ValueError:
+        raise ValueError("Invalid page token")
+    if payload.get("order") != order or payload.get("search") != search:
+        raise ValueError("Page token belongs to a different search")
+    return payload["key"]
+
+def search_names_page(cursor, query, state="", entity_type="", limit=10, after=None, order="id", method="columns"):
+    """Keyset-paginated name search, one row per ABN. Returns (rows, next_token); pass the token back as after=.
+
+    order="id" seeks past the last row so a page reads only what it returns; order="rank" ranks every match per page.
+    """
+    search = [query, state, entity_type, method]
+    sql, params = name_search_sql(query, state, entity_type, search_method(cursor, state, method), with_keys=True)
+
+    if order == "rank":
+        sql = f"SELECT abn, name, state, postcode, MIN(rank) AS best FROM ({sql}) GROUP BY abn"
+        if after:
+            best, abn = decode_page_token(after, order, search)
+            sql = f"SELECT * FROM ({sql}) WHERE (best, abn) > (?, ?)"
+            params += [best, abn]
+        cursor.execute(f"{sql} ORDER BY best, abn LIMIT ?", params + [limit + 1])
+        rows = cursor.fetchall()
+        next_token = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_token = encode_page_token(order, [rows[-1][4], rows[-1][0]], search)
+        return [row[:4] for row in rows], next_token
+
+    if order != "id":
+        raise ValueError(f"Unknown order {order!r}")
+    last_id, last_abn = decode_page_token(after, order, search) if after else (0, None)
+    rows = []
+    seen = set()
+    exhausted = False
+    while len(rows) < limit and not exhausted:
+        # Over-fetch, since rows for an ABN already on this page are skipped
+        cursor.execute(f"SELECT * FROM ({sql}) WHERE id > ? ORDER BY id LIMIT ?", params + [last_id, limit * 2])
+        chunk = cursor.fetchall()
+        exhausted = len(chunk) < limit * 2
+        for abn, name, row_state, postcode, row_id, rank in chunk:
+            if len(rows) == limit:
+                break
+            last_id = row_id
+            if abn == last_abn or abn in seen:
+                continue
+            seen.add(abn)
+            last_abn = abn
+            rows.append((abn, name, row_state, postcode))
+        else:
+            continue
+        break
+    next_token = None
+    if len(rows) == limit:
+        cursor.execute(f"SELECT 1 FROM ({sql}) WHERE id > ? AND abn != ? LIMIT 1", params + [last_id, last_abn])
+        if cursor.fetchone():
+            next_token = encode_page_token(order, [last_id, last_abn], search)
+    return rows, next_token
+
+def get_entity(cursor, abn):
+    """Full entity record from entity_docs in one point read, or None if the ABN is unknown."""
+    cursor.execute("SELECT doc FROM entity_docs WHERE abn = ?", (abn,))
+    row = cursor.fetchone()
+    return json.loads(row[0]) if row else None
+
+def get_entities(cursor, abns):
+    """Entity records for many ABNs, as a dict keyed by ABN. Unknown ABNs are left out."""
+    # Sorted chunks read the WITHOUT ROWID b-tree in key order
+    abns = sorted(set(abns))
+    entities = {}
+    for i in range(0, len(abns), 500):
+        chunk = abns[i:i + 500]
+        cursor.execute(f"SELECT abn, doc FROM entity_docs WHERE abn IN ({','.join('?' * len(chunk))})", chunk)
+        for abn, doc in cursor.fetchall():
+            entities[abn] = json.loads(doc)
+    return entities
+
+def query_terms(text):
+    """Approximate the unicode61 remove_diacritics tokenizer for count estimates."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return "".join(c if c.isalnum() else " " for c in text).split()
+
+def estimate_names(cursor, query, state="", entity_type=""):
+    """Estimate the number of matching names (not ABNs) from term document counts, scaled for the filters.
+
+    It usually comes out above the exact count, so show it as approximate.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return 0
+
+    def term_docs(col, term, prefix=False):
+        if prefix and len(term) <= 4:
+            cursor.execute("SELECT docs FROM search_prefix_counts WHERE prefix = ?", (term,))
+        elif prefix:
+            cursor.execute("SELECT COALESCE(SUM(doc), 0) FROM search_names_vocab WHERE col = ? AND term >= ? AND term < ?",
+                           (col, term, term + "\U0010ffff"))
+        else:
+            cursor.execute("SELECT doc FROM search_names_vocab WHERE col = ? AND term = ?", (col, term))
+        row = cursor.fetchone()
+        return row[0] if row and row[0] else 0
+
+    cursor.execute("SELECT docs FROM search_prefix_counts WHERE prefix = ''")
+    total = cursor.fetchone()[0] or 1
+
+    # The last term is a prefix, the others must match whole words
+    estimate = min([term_docs("name", term) for term in terms[:-1]] + [term_docs("name", terms[-1], prefix=True)])
+    # Prefix counts add up per term, so they can exceed the number of names
+    estimate = min(estimate, total)
+    if state:
+        estimate *= min(1.0, min((term_docs("state", term) for term in query_terms(state)), default=0) / total)
+    if entity_type:
+        estimate *= min(1.0, min((term_docs("entity_type_text", term) for term in query_terms(entity_type)), default=0) / total)
+    return int(round(estimate))
+
+def count_names(cursor, query, state="", entity_type="", mode="exact", cap=1000):
+    """Total for a name search. Returns (count, exact).
+
+    mode is "exact" (distinct ABNs), "at_least" (stops at cap) or "estimate" (names, see estimate_names).
+    """
+    if mode == "estimate":
+        return estimate_names(cursor, query, state, entity_type), False
+
+    sql, params = name_search_sql(query, state, entity_type)
+    if mode == "at_least":
+        cursor.execute(f"SELECT COUNT(*) FROM (SELECT DISTINCT abn FROM ({sql}) LIMIT ?)", params + [cap])
+        count = cursor.fetchone()[0]
+        return count, count < cap
+    cursor.execute(f"SELECT COUNT(DISTINCT abn) FROM ({sql})", params)
+    return cursor.fetchone()[0], True
+
+if __name__ == "__main__":
+    db_path = r"D:\FIRMABLE\db\abn.db"
+    conn = connect_readonly(db_path)
+    for row in search_names(conn.cursor(), "forest coach", state="NSW"):
+        print(row)
+    conn.close()
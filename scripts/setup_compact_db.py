@@ -0,0 +1,135 @@
+import sqlite3
+
+def create_compact_tables(cursor):
+    # Low-cardinality strings (statuses, entity types, name types, states, ...)
+    # are stored once here and referenced by code everywhere else
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS codes (
+            code INTEGER PRIMARY KEY,
+            kind TEXT NOT NULL,
+            value TEXT NOT NULL,
+            UNIQUE (kind, value)
+        )
+    """)
+
+    # One row per ABN for everything that occurs at most once in an ABR record.
+    # abn is the INTEGER PRIMARY KEY, i.e. the rowid, so the table is already
+    # clustered on it without a separate index. Dates are YYYYMMDD integers.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS entities (
+            abn INTEGER PRIMARY KEY,
+            record_last_updated_date INTEGER,
+            status INTEGER REFERENCES codes(code),
+            status_date INTEGER,
+            entity_type_ind INTEGER REFERENCES codes(code),
+            entity_type_text INTEGER REFERENCES codes(code),
+            main_name_type INTEGER REFERENCES codes(code),
+            main_name TEXT,
+            legal_name_type INTEGER REFERENCES codes(code),
+            name_title INTEGER REFERENCES codes(code),
+            given_name TEXT,
+            family_name TEXT,
+            state INTEGER REFERENCES codes(code),
+            postcode TEXT,
+            asic_number TEXT,
+            asic_number_type INTEGER REFERENCES codes(code),
+            gst_status INTEGER REFERENCES codes(code),
+            gst_status_date INTEGER
+        )
+    """)
+
+    # DGR funds
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS entity_dgrs (
+            abn INTEGER,
+            seq INTEGER,
+            status_date INTEGER,
+            name_type INTEGER REFERENCES codes(code),
+            name TEXT,
+            PRIMARY KEY (abn, seq)
+        ) WITHOUT ROWID
+    """)
+
+    # Other entities (trading/business names)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS entity_other_names (
+            abn INTEGER,
+            seq INTEGER,
+            name_type INTEGER REFERENCES codes(code),
+            name TEXT,
+            PRIMARY KEY (abn, seq)
+        ) WITHOUT ROWID
+    """)
+
+def create_compat_views(cursor):
+    # Views with the names and TEXT columns of the setup_db.py schema, so
+    # verify_db.py and ad hoc queries keep working against a compact database
+    def decode(column):
+        return f"COALESCE((SELECT value FROM codes WHERE code = {column}), '')"
+
+    def date(column):
+        return f"COALESCE(CAST({column} AS TEXT), '')"
+
+    views = {
+        "abrs": f"""
+            SELECT CAST(abn AS TEXT) AS abn, {date('record_last_updated_date')} AS record_last_updated_date
+            FROM entities
+        """,
+        "abns": f"""
+            SELECT CAST(abn AS TEXT) AS abn, {decode('status')} AS status, {date('status_date')} AS status_date
+            FROM entities
+        """,
+        "entity_types": f"""
+            SELECT CAST(abn AS TEXT) AS abn, {decode('entity_type_ind')} AS entity_type_ind,
+                   {decode('entity_type_text')} AS entity_type_text
+            FROM entities
+        """,
+        "main_entities": f"""
+            SELECT CAST(abn AS TEXT) AS abn, {decode('main_name_type')} AS name_type, main_name AS name
+            FROM entities WHERE main_name IS NOT NULL
+        """,
+        "legal_entities": f"""
+            SELECT CAST(abn AS TEXT) AS abn, {decode('legal_name_type')} AS name_type, {decode('name_title')} AS name_title,
+                   COALESCE(given_name, '') AS given_name, COALESCE(family_name, '') AS family_name
+            FROM entities WHERE given_name IS NOT NULL OR family_name IS NOT NULL
+        """,
+        "addresses": f"""
+            SELECT CAST(abn AS TEXT) AS abn, {decode('state')} AS state, COALESCE(postcode, '') AS postcode
+            FROM entities WHERE state IS NOT NULL OR postcode IS NOT NULL
+        """,
+        "asic_numbers": f"""
+            SELECT CAST(abn AS TEXT) AS abn, asic_number, {decode('asic_number_type')} AS asic_number_type
+            FROM entities WHERE asic_number IS NOT NULL
+        """,
+        "gst_statuses": f"""
+            SELECT CAST(abn AS TEXT) AS abn, {decode('gst_status')} AS status, {date('gst_status_date')} AS status_date
+            FROM entities WHERE gst_status IS NOT NULL
+        """,
+        "dgrs": f"""
+            SELECT CAST(abn AS TEXT) AS abn, {date('status_date')} AS status_date, {decode('name_type')} AS name_type,
+                   COALESCE(name, '') AS name
+            FROM entity_dgrs
+        """,
+        "other_entities": f"""
+            SELECT CAST(abn AS TEXT) AS abn, {decode('name_type')} AS name_type, name
+            FROM entity_other_names
+        """,
+    }
+    for name, select in views.items():
+        cursor.execute(f"CREATE VIEW IF NOT EXISTS {name} AS {select}")
+
+def setup_compact_database(db_path):
+    print(f"Creating compact database at {db_path}...")
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    create_compact_tables(cursor)
+    create_compat_views(cursor)
+
+    conn.commit()
+    print("Compact database schema created.")
+    conn.close()
+
+if __name__ == "__main__":
+    db_path = r"D:\FIRMABLE\db\abn_compact.db"
+    setup_compact_database(db_path)
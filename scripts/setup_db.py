@@ -1,10 +1,6 @@
 import sqlite3
 
-def setup_database(db_path):
-    print(f"Creating database at {db_path}...")
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
+def create_tables(cursor):
     # ABR (root record)
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS abrs (
@@ -106,6 +102,25 @@ def setup_database(db_path):
         )
     """)
 
+    create_entity_docs_table(cursor)
+
+def create_entity_docs_table(cursor):
+    """Whole entity record as JSON, for single-read detail lookups."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS entity_docs (
+            abn TEXT PRIMARY KEY,
+            doc TEXT,
+            FOREIGN KEY (abn) REFERENCES abrs(abn)
+        ) WITHOUT ROWID
+    """)
+
+def setup_database(db_path):
+    print(f"Creating database at {db_path}...")
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    create_tables(cursor)
+
     conn.commit()
     print("Database schema created.")
     conn.close()
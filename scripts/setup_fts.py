@@ -1,22 +1,40 @@
 import sqlite3
 
-def setup_fts(db_path):
-    print(f"Setting up FTS5 tables in {db_path}...")
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+# Every search is a prefix query, so build prefix indexes for the short
+# prefixes that would otherwise scan a large part of the term dictionary
+DEFAULT_FTS_OPTIONS = {
+    "prefix": "2 3 4",
+    "tokenize": "unicode61 remove_diacritics 2",
+}
 
+def fts_options(options=None):
+    """Turn an options dict (prefix, tokenize, detail, columnsize) into the tail of a CREATE VIRTUAL TABLE ... fts5."""
+    options = DEFAULT_FTS_OPTIONS if options is None else options
+    parts = []
+    if options.get("prefix"):
+        parts.append(f"prefix='{options['prefix']}'")
+    if options.get("tokenize"):
+        parts.append(f"tokenize='{options['tokenize']}'")
+    if options.get("detail"):
+        parts.append(f"detail={options['detail']}")
+    if options.get("columnsize") is False:
+        parts.append("columnsize=0")
+    return "".join(f", {part}" for part in parts)
+
+def create_fts_tables(cursor, options=None):
     # Create FTS5 tables
-    cursor.execute("""
+    cursor.execute(f"""
         CREATE VIRTUAL TABLE IF NOT EXISTS main_entities_fts USING fts5(
-            abn, name, content='main_entities', content_rowid='rowid'
+            abn, name, content='main_entities', content_rowid='rowid'{fts_options(options)}
         )
     """)
-    cursor.execute("""
+    cursor.execute(f"""
         CREATE VIRTUAL TABLE IF NOT EXISTS other_entities_fts USING fts5(
-            abn, name, content='other_entities', content_rowid='rowid'
+            abn, name, content='other_entities', content_rowid='rowid'{fts_options(options)}
         )
     """)
 
+def populate_fts(cursor):
     # Populate FTS5 tables
     cursor.execute("""
         INSERT INTO main_entities_fts(rowid, abn, name)
@@ -27,10 +45,23 @@ def setup_fts(db_path):
         SELECT rowid, abn, name FROM other_entities
     """)
 
+def optimize_fts(cursor):
+    # Merge the FTS5 b-trees into a single segment for faster reads
+    cursor.execute("INSERT INTO main_entities_fts(main_entities_fts) VALUES('optimize')")
+    cursor.execute("INSERT INTO other_entities_fts(other_entities_fts) VALUES('optimize')")
+
+def setup_fts(db_path, options=None):
+    print(f"Setting up FTS5 tables in {db_path}...")
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    create_fts_tables(cursor, options)
+    populate_fts(cursor)
+
     conn.commit()
     print("FTS5 tables created and populated.")
     conn.close()
 
 if __name__ == "__main__":
     db_path = r"D:\FIRMABLE\db\abn.db"
-    setup_fts(db_path)
\ No newline at end of file
+    setup_fts(db_path)
@@ -1,9 +1,14 @@
 import sqlite3
 
-def setup_fts_triggers(db_path):
-    print(f"Setting up FTS5 triggers in {db_path}...")
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+def create_fts_triggers(cursor):
+    # Replace triggers left by older versions of this script
+    for trigger in ["main_entities_insert", "main_entities_delete", "main_entities_update",
+                    "other_entities_insert", "other_entities_delete", "other_entities_update"]:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+    # The FTS tables are external content tables, so removing a row has to go
+    # through the 'delete' command with the old values; by the time an AFTER
+    # trigger runs the content row is already gone.
 
     # Triggers for main_entities
     cursor.execute("""
@@ -18,14 +23,16 @@ def setup_fts_triggers(db_path):
         CREATE TRIGGER IF NOT EXISTS main_entities_delete
         AFTER DELETE ON main_entities
         BEGIN
-            DELETE FROM main_entities_fts WHERE rowid = old.rowid;
+            INSERT INTO main_entities_fts(main_entities_fts, rowid, abn, name)
+            VALUES ('delete', old.rowid, old.abn, old.name);
         END
     """)
     cursor.execute("""
         CREATE TRIGGER IF NOT EXISTS main_entities_update
         AFTER UPDATE ON main_entities
         BEGIN
-            DELETE FROM main_entities_fts WHERE rowid = old.rowid;
+            INSERT INTO main_entities_fts(main_entities_fts, rowid, abn, name)
+            VALUES ('delete', old.rowid, old.abn, old.name);
             INSERT INTO main_entities_fts(rowid, abn, name)
             VALUES (new.rowid, new.abn, new.name);
         END
@@ -44,23 +51,32 @@ def setup_fts_triggers(db_path):
         CREATE TRIGGER IF NOT EXISTS other_entities_delete
         AFTER DELETE ON other_entities
         BEGIN
-            DELETE FROM other_entities_fts WHERE rowid = old.rowid;
+            INSERT INTO other_entities_fts(other_entities_fts, rowid, abn, name)
+            VALUES ('delete', old.rowid, old.abn, old.name);
         END
     """)
     cursor.execute("""
         CREATE TRIGGER IF NOT EXISTS other_entities_update
         AFTER UPDATE ON other_entities
         BEGIN
-            DELETE FROM other_entities_fts WHERE rowid = old.rowid;
+            INSERT INTO other_entities_fts(other_entities_fts, rowid, abn, name)
+            VALUES ('delete', old.rowid, old.abn, old.name);
             INSERT INTO other_entities_fts(rowid, abn, name)
             VALUES (new.rowid, new.abn, new.name);
         END
     """)
 
+def setup_fts_triggers(db_path):
+    print(f"Setting up FTS5 triggers in {db_path}...")
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    create_fts_triggers(cursor)
+
     conn.commit()
     print("FTS5 triggers created.")
     conn.close()
 
 if __name__ == "__main__":
     db_path = r"D:\FIRMABLE\db\abn.db"
-    setup_fts_triggers(db_path)
\ No newline at end of file
+    setup_fts_triggers(db_path)
@@ -0,0 +1,251 @@
+import sqlite3
+from setup_fts import fts_options
+
+# Inline columns copied from the ABN's other tables, as SQL over the ABN expression
+def inline_columns(abn):
+    return f"""
+        (SELECT state FROM addresses WHERE abn = {abn} LIMIT 1),
+        (SELECT postcode FROM addresses WHERE abn = {abn} LIMIT 1),
+        (SELECT entity_type_ind FROM entity_types WHERE abn = {abn}),
+        (SELECT entity_type_text FROM entity_types WHERE abn = {abn}),
+        (SELECT status FROM abns WHERE abn = {abn})
+    """
+
+INSERT_COLUMNS = """
+    search_names (abn, name, name_source, source_rowid, state, postcode, entity_type_ind, entity_type_text, abn_status)
+"""
+
+def state_partition(state):
+    """Name of the per-state FTS5 index, or None if the state can't be used in a table name."""
+    if not state or not state.isalnum():
+        return None
+    return f"search_state_fts_{state.lower()}"
+
+def drop_search_tables(cursor):
+    # The projection is derived data, so a rebuild starts from scratch
+    cursor.execute("""
+        SELECT name FROM sqlite_master
+        WHERE type = 'table' AND name GLOB 'search_state_fts_*' AND sql LIKE 'CREATE VIRTUAL TABLE%'
+    """)
+    for (name,) in cursor.fetchall():
+        cursor.execute(f"DROP TABLE IF EXISTS {name}")
+    cursor.execute("DROP TABLE IF EXISTS search_names_fts")
+    cursor.execute("DROP TABLE IF EXISTS search_names")
+
+def create_search_tables(cursor, options=None):
+    # One row per (abn, name, name_source) with the filter and display columns inline
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS search_names (
+            id INTEGER PRIMARY KEY,
+            abn TEXT,
+            name TEXT,
+            name_source TEXT,
+            source_rowid INTEGER,
+            state TEXT,
+            postcode TEXT,
+            entity_type_ind TEXT,
+            entity_type_text TEXT,
+            abn_status TEXT
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_search_names_abn ON search_names(abn)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_search_names_source ON search_names(name_source, source_rowid)")
+
+    # state and entity_type_text are indexed so filters can be part of the MATCH
+    # expression. Name queries must be scoped to the name column, and only the
+    # name column counts towards rank.
+    cursor.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_names_fts USING fts5(
+            name, state, entity_type_text, abn UNINDEXED, postcode UNINDEXED,
+            content='search_names', content_rowid='id'{fts_options(options)}
+        )
+    """)
+    cursor.execute("INSERT INTO search_names_fts(search_names_fts, rank) VALUES('rank', 'bm25(1.0, 0.0, 0.0)')")
+
+def create_term_counts(cursor):
+    """Precompute how many names match each 1-4 character prefix ('' holds the total). Triggers don't update it."""
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_names_vocab USING fts5vocab(search_names_fts, 'col')
+    """)
+    cursor.execute("DROP TABLE IF EXISTS search_prefix_counts")
+    cursor.execute("""
+        CREATE TABLE search_prefix_counts (
+            prefix TEXT PRIMARY KEY,
+            docs INTEGER
+        ) WITHOUT ROWID
+    """)
+
+    counts = {}
+    cursor.execute("SELECT term, doc FROM search_names_vocab WHERE col = 'name'")
+    for term, docs in cursor:
+        # A name with two terms sharing a prefix is counted twice; fine for an estimate
+        for length in range(1, min(len(term), 4) + 1):
+            prefix = term[:length]
+            counts[prefix] = counts.get(prefix, 0) + docs
+    cursor.execute("SELECT COUNT(*) FROM search_names")
+    counts[""] = cursor.fetchone()[0]
+    cursor.executemany("INSERT INTO search_prefix_counts (prefix, docs) VALUES (?, ?)", counts.items())
+
+def create_state_partitions(cursor, options=None):
+    """Alternative to the filter columns: a separate name index, search_state_fts_<state>, for each state."""
+    cursor.execute("SELECT DISTINCT state FROM search_names")
+    states = [state for (state,) in cursor.fetchall() if state_partition(state)]
+    for state in states:
+        table = state_partition(state)
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(
+                name, abn UNINDEXED, postcode UNINDEXED,
+                content='search_names', content_rowid='id'{fts_options(options)}
+            )
+        """)
+        cursor.execute(f"""
+            INSERT INTO {table}(rowid, name, abn, postcode)
+            SELECT id, name, abn, postcode FROM search_names WHERE state = ?
+        """, (state,))
+
+        # One trigger per event so a row moving between states is removed
+        # from the old partition before it is added to the new one
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_insert
+            AFTER INSERT ON search_names WHEN new.state = '{state}'
+            BEGIN
+                INSERT INTO {table}(rowid, name, abn, postcode)
+                VALUES (new.id, new.name, new.abn, new.postcode);
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_delete
+            AFTER DELETE ON search_names WHEN old.state = '{state}'
+            BEGIN
+                INSERT INTO {table}({table}, rowid, name, abn, postcode)
+                VALUES ('delete', old.id, old.name, old.abn, old.postcode);
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_update
+            AFTER UPDATE ON search_names WHEN old.state = '{state}' OR new.state = '{state}'
+            BEGIN
+                INSERT INTO {table}({table}, rowid, name, abn, postcode)
+                SELECT 'delete', old.id, old.name, old.abn, old.postcode WHERE old.state = '{state}';
+                INSERT INTO {table}(rowid, name, abn, postcode)
+                SELECT new.id, new.name, new.abn, new.postcode WHERE new.state = '{state}';
+            END
+        """)
+    return states
+
+def populate_search_tables(cursor):
+    # Rows are inserted in ABN order so an ABN's names sit next to each other
+    cursor.execute(f"""
+        INSERT INTO {INSERT_COLUMNS}
+        SELECT abn, name, source, source_rowid, {inline_columns('n.abn')}
+        FROM (
+            SELECT abn, name, 'main' AS source, rowid AS source_rowid FROM main_entities
+            UNION ALL
+            SELECT abn, name, 'other' AS source, rowid AS source_rowid FROM other_entities
+        ) n
+        ORDER BY abn, source, source_rowid
+    """)
+    cursor.execute("INSERT INTO search_names_fts(search_names_fts) VALUES('rebuild')")
+
+def create_search_triggers(cursor):
+    # Keep search_names_fts in sync with search_names (external content)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS search_names_insert
+        AFTER INSERT ON search_names
+        BEGIN
+            INSERT INTO search_names_fts(rowid, name, abn, postcode, state, entity_type_text)
+            VALUES (new.id, new.name, new.abn, new.postcode, new.state, new.entity_type_text);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS search_names_delete
+        AFTER DELETE ON search_names
+        BEGIN
+            INSERT INTO search_names_fts(search_names_fts, rowid, name, abn, postcode, state, entity_type_text)
+            VALUES ('delete', old.id, old.name, old.abn, old.postcode, old.state, old.entity_type_text);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS search_names_update
+        AFTER UPDATE ON search_names
+        BEGIN
+            INSERT INTO search_names_fts(search_names_fts, rowid, name, abn, postcode, state, entity_type_text)
+            VALUES ('delete', old.id, old.name, old.abn, old.postcode, old.state, old.entity_type_text);
+            INSERT INTO search_names_fts(rowid, name, abn, postcode, state, entity_type_text)
+            VALUES (new.id, new.name, new.abn, new.postcode, new.state, new.entity_type_text);
+        END
+    """)
+
+    # Keep search_names in sync with the name tables
+    for table, source in [("main_entities", "main"), ("other_entities", "other")]:
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS search_{table}_insert
+            AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO {INSERT_COLUMNS}
+                VALUES (new.abn, new.name, '{source}', new.rowid, {inline_columns('new.abn')});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS search_{table}_delete
+            AFTER DELETE ON {table}
+            BEGIN
+                DELETE FROM search_names WHERE name_source = '{source}' AND source_rowid = old.rowid;
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS search_{table}_update
+            AFTER UPDATE ON {table}
+            BEGIN
+                DELETE FROM search_names WHERE name_source = '{source}' AND source_rowid = old.rowid;
+                INSERT INTO {INSERT_COLUMNS}
+                VALUES (new.abn, new.name, '{source}', new.rowid, {inline_columns('new.abn')});
+            END
+        """)
+
+    # Keep the inline columns in sync with the tables they are copied from
+    inline_updates = {
+        "addresses": """
+            state = (SELECT state FROM addresses WHERE abn = search_names.abn LIMIT 1),
+            postcode = (SELECT postcode FROM addresses WHERE abn = search_names.abn LIMIT 1)
+        """,
+        "entity_types": """
+            entity_type_ind = (SELECT entity_type_ind FROM entity_types WHERE abn = search_names.abn),
+            entity_type_text = (SELECT entity_type_text FROM entity_types WHERE abn = search_names.abn)
+        """,
+        "abns": """
+            abn_status = (SELECT status FROM abns WHERE abn = search_names.abn)
+        """,
+    }
+    for table, assignments in inline_updates.items():
+        for event, where in [("INSERT", "abn = new.abn"), ("DELETE", "abn = old.abn"),
+                             ("UPDATE", "abn IN (old.abn, new.abn)")]:
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS search_{table}_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE search_names SET {assignments} WHERE {where};
+                END
+            """)
+
+def setup_search_index(db_path, partition_by_state=False, options=None):
+    print(f"Setting up search projection in {db_path}...")
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    drop_search_tables(cursor)
+    create_search_tables(cursor, options)
+    populate_search_tables(cursor)
+    create_search_triggers(cursor)
+    create_term_counts(cursor)
+    if partition_by_state:
+        states = create_state_partitions(cursor, options)
+        print(f"Per-state indexes created for {', '.join(states)}.")
+
+    conn.commit()
+    print("Search projection created and populated.")
+    conn.close()
+
+if __name__ == "__main__":
+    db_path = r"D:\FIRMABLE\db\abn.db"
+    setup_search_index(db_path)
@@ -0,0 +1,62 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from setup_db import setup_database
+
+def abr_record(abn, updated="20200101", name="acme pty ltd", state="NSW", postcode="2000", other_names=()):
+    """One <ABR> element for a non-individual, as it appears in the extract."""
+    others = "".join(f'<OtherEntity><NonIndividualName type="TRD"><NonIndividualNameText>{other}'
+                     f"</NonIndividualNameText></NonIndividualName></OtherEntity>" for other in other_names)
+    return (f'<ABR recordLastUpdatedDate="{updated}" replaced="N">'
+            f'<ABN status="ACT" ABNStatusFromDate="{updated}">{abn}</ABN>'
+            f"<EntityType><EntityTypeInd>PRV</EntityTypeInd><EntityTypeText>Australian Private Company"
+            f"</EntityTypeText></EntityType>"
+            f'<MainEntity><NonIndividualName type="MN"><NonIndividualNameText>{name}</NonIndividualNameText>'
+            f"</NonIndividualName><BusinessAddress><AddressDetails><State>{state}</State>"
+            f"<Postcode>{postcode}</Postcode></AddressDetails></BusinessAddress></MainEntity>"
+            f"{others}</ABR>\n")
+
+def extract_xml(records):
+    return '<?xml version="1.0" encoding="UTF-8"?>\n<Transfer>\n' + "".join(records) + "</Transfer>\n"
+
+def write_extract(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(extract_xml(records))
+    return str(path)
+
+def table_rows(db_path, table):
+    conn = sqlite3.connect(db_path)
+    rows = sorted(conn.execute(f"SELECT * FROM {table}").fetchall())
+    conn.close()
+    return rows
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "abn.db")
+    setup_database(path)
+    return path
+
+@pytest.fixture(scope="session")
+def search_db(tmp_path_factory):
+    """A small synthetic extract loaded, indexed and with the search projection built, per-state partitions included.
+
+    Yields (db_path, abns). Tests must not write to it.
+    """
+    from bench_suite import generate_xml
+    from index_db import add_indexes
+    from parse_xml import process_all_files
+    from setup_search_index import setup_search_index
+
+    workdir = tmp_path_factory.mktemp("search")
+    abns = generate_xml(str(workdir), 2000, files=1)
+    path = str(workdir / "abn.db")
+    setup_database(path)
+    process_all_files(str(workdir), path)
+    add_indexes(path)
+    setup_search_index(path, partition_by_state=True)
+    return path, abns
@@ -0,0 +1,15 @@
+import sqlite3
+
+import pytest
+
+from bulk_build import check_not_in_use
+from db_pool import enable_wal
+
+def test_swap_refused_while_a_wal_reader_is_open(db_path):
+    enable_wal(db_path)
+    reader = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    reader.execute("SELECT COUNT(*) FROM abrs").fetchone()
+    with pytest.raises(RuntimeError):
+        check_not_in_use(db_path)
+    reader.close()
+    check_not_in_use(db_path)
@@ -0,0 +1,85 @@
+import os
+import shutil
+import sqlite3
+
+from cache import QueryCache
+from conftest import abr_record, write_extract
+from index_db import add_indexes
+from parse_xml import process_all_files
+
+ABN = "51824753556"
+
+def load(db_path, tmp_path, name, updated, delta=False, on_change=None):
+    xml_dir = tmp_path / updated
+    xml_dir.mkdir()
+    write_extract(xml_dir / "20250409_Public01.xml", [abr_record(ABN, updated=updated, name=name)])
+    process_all_files(str(xml_dir), db_path, delta=delta, on_change=on_change)
+
+def test_write_by_another_connection_flushes_the_cache(db_path, tmp_path):
+    load(db_path, tmp_path, "alpha pty ltd", "20200101")
+    cache = QueryCache(db_path)
+    assert cache.entity(ABN)["mainName"]["name"] == "alpha pty ltd"
+    assert cache.entity(ABN)["mainName"]["name"] == "alpha pty ltd"
+    assert cache.stats()["hits"] == 1
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE entity_docs SET doc = json_set(doc, '$.mainName.name', 'renamed') WHERE abn = ?", (ABN,))
+    conn.commit()
+    conn.close()
+
+    assert cache.entity(ABN)["mainName"]["name"] == "renamed"
+    assert cache.stats()["flushes"] == 1
+    cache.close()
+
+def test_loader_hook_drops_only_changed_abns(db_path, tmp_path):
+    load(db_path, tmp_path, "alpha pty ltd", "20200101")
+    add_indexes(db_path)
+    cache = QueryCache(db_path)
+    assert cache.entity(ABN)["mainName"]["name"] == "alpha pty ltd"
+    assert cache.entity("53004085616") is None
+
+    load(db_path, tmp_path, "alpha renamed pty ltd", "20240101", delta=True, on_change=cache.invalidate_abns)
+
+    assert cache.entity(ABN)["mainName"]["name"] == "alpha renamed pty ltd"
+    stats = cache.stats()
+    assert stats["flushes"] == 0
+    assert stats["invalidations"] >= 1
+    # The unrelated entry survived the load
+    assert cache.entity("53004085616") is None
+    assert cache.stats()["hits"] == stats["hits"] + 1
+    cache.close()
+
+def rename(db_path, name):
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE entity_docs SET doc = json_set(doc, '$.mainName.name', ?) WHERE abn = ?", (name, ABN))
+    conn.commit()
+    conn.close()
+
+def test_swapped_database_file_flushes_the_cache(db_path, tmp_path):
+    load(db_path, tmp_path, "alpha pty ltd", "20200101")
+    cache = QueryCache(db_path)
+    assert cache.entity(ABN)["mainName"]["name"] == "alpha pty ltd"
+
+    new_path = str(tmp_path / "new.db")
+    shutil.copy(db_path, new_path)
+    rename(new_path, "swapped")
+    os.replace(new_path, db_path)
+
+    assert cache.entity(ABN)["mainName"]["name"] == "swapped"
+    assert cache.stats()["flushes"] == 1
+    cache.close()
+
+def test_shared_entries_follow_changes_seen_by_any_worker(db_path, tmp_path):
+    load(db_path, tmp_path, "alpha pty ltd", "20200101")
+    shared_path = str(tmp_path / "memo.db")
+    first = QueryCache(db_path, shared_path=shared_path)
+    second = QueryCache(db_path, shared_path=shared_path)
+    assert first.entity(ABN)["mainName"]["name"] == "alpha pty ltd"
+    assert second.entity(ABN)["mainName"]["name"] == "alpha pty ltd"
+    assert second.stats()["shared_hits"] == 1
+
+    rename(db_path, "renamed")
+    assert second.entity(ABN)["mainName"]["name"] == "renamed"
+    assert first.entity(ABN)["mainName"]["name"] == "renamed"
+    first.close()
+    second.close()
@@ -0,0 +1,75 @@
+import sqlite3
+
+import pytest
+
+import parse_xml
+from bench_suite import generate_xml
+from conftest import abr_record, table_rows, write_extract
+from parse_xml import TABLES, process_all_files
+from setup_db import setup_database
+
+@pytest.fixture(scope="module")
+def extract(tmp_path_factory):
+    """Two files, the first long enough for several 10000-record batches."""
+    xml_dir = tmp_path_factory.mktemp("extract")
+    generate_xml(str(xml_dir), 25000, files=1)
+    # generate_xml always starts at Public01
+    (xml_dir / "20250409_Public01.xml").rename(xml_dir / "20250409_Public00.xml")
+    generate_xml(str(xml_dir), 3000, files=1, seed=1)
+    return str(xml_dir)
+
+def progress(db_path):
+    return {name: (done, completed) for name, _, done, completed, _ in table_rows(db_path, "ingest_progress")}
+
+def test_resume_after_interruption_matches_a_clean_load(extract, tmp_path, monkeypatch):
+    clean = str(tmp_path / "clean.db")
+    setup_database(clean)
+    process_all_files(extract, clean)
+
+    resumed = str(tmp_path / "resumed.db")
+    setup_database(resumed)
+    insert_batch = parse_xml.insert_batch
+    calls = []
+
+    def crash_on_second_batch(cursor, batch):
+        calls.append(len(batch["abrs"]))
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+        insert_batch(cursor, batch)
+
+    monkeypatch.setattr(parse_xml, "insert_batch", crash_on_second_batch)
+    with pytest.raises(KeyboardInterrupt):
+        process_all_files(extract, resumed)
+    assert progress(resumed) == {"20250409_Public00.xml": (10000, 0)}
+
+    def count_batches(cursor, batch):
+        calls.append(len(batch["abrs"]))
+        insert_batch(cursor, batch)
+
+    calls.clear()
+    monkeypatch.setattr(parse_xml, "insert_batch", count_batches)
+    process_all_files(extract, resumed)
+    # The committed batch was skipped, not extracted and written again
+    assert calls == [10000, 5000, 3000]
+    assert progress(resumed) == {"20250409_Public00.xml": (25000, 1), "20250409_Public01.xml": (3000, 1)}
+
+    for table in TABLES:
+        assert table_rows(resumed, table) == table_rows(clean, table), table
+
+def test_completed_files_are_skipped_unless_they_change(db_path, tmp_path):
+    xml_dir = tmp_path / "xml"
+    xml_dir.mkdir()
+    xml_file = write_extract(xml_dir / "20250409_Public01.xml", [abr_record("51824753556")])
+    process_all_files(str(xml_dir), db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("DELETE FROM abrs")
+    conn.commit()
+    conn.close()
+
+    process_all_files(str(xml_dir), db_path)
+    assert table_rows(db_path, "abrs") == []
+
+    write_extract(xml_file, [abr_record("51824753556"), abr_record("53004085616")])
+    process_all_files(str(xml_dir), db_path)
+    assert [abn for abn, _ in table_rows(db_path, "abrs")] == ["51824753556", "53004085616"]
+    assert progress(db_path) == {"20250409_Public01.xml": (2, 1)}
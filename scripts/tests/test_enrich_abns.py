@@ -0,0 +1,75 @@
+import csv
+import json
+import random
+
+import pytest
+
+from bench_suite import make_abn
+from enrich_abns import abn_is_valid, enrich_file
+
+@pytest.mark.parametrize("abn", ["51824753556", "53004085616", "33051775556"])
+def test_valid_abns(abn):
+    assert abn_is_valid(abn)
+
+@pytest.mark.parametrize("abn", [
+    "51824753557",   # last digit off
+    "15824753556",   # digits swapped
+    "5182475355",    # too short
+    "518247535561",  # too long
+    "5182475355a",
+    "",
+])
+def test_invalid_abns(abn):
+    assert not abn_is_valid(abn)
+
+def test_checksum_catches_every_single_digit_error():
+    rng = random.Random(0)
+    for _ in range(200):
+        abn = make_abn(rng.randrange(10 ** 9))
+        assert abn_is_valid(abn)
+        position = rng.randrange(11)
+        digit = str((int(abn[position]) + rng.randint(1, 9)) % 10)
+        assert not abn_is_valid(abn[:position] + digit + abn[position + 1:])
+
+def test_enrich_csv_and_jsonl(search_db, tmp_path):
+    db_path, abns = search_db
+    unknown = make_abn(123456789)
+    assert unknown not in abns
+    inputs = [abns[0], f" {abns[1][:2]} {abns[1][2:]} ", unknown, "12345678901"]
+
+    with open(tmp_path / "in.csv", "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows([["id", "abn"]] + [[i, abn] for i, abn in enumerate(inputs)])
+    stats = enrich_file(str(tmp_path / "in.csv"), str(tmp_path / "out.csv"), db_path)
+    assert (stats["total"], stats["found"], stats["invalid"]) == (4, 2, 1)
+    with open(tmp_path / "out.csv", newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [(row["abn_valid"], row["found"]) for row in rows] == [("Y", "Y"), ("Y", "Y"), ("Y", "N"), ("N", "N")]
+
+    with open(tmp_path / "in.jsonl", "w", encoding="utf-8") as f:
+        f.writelines(json.dumps({"abn": abn}) + "\n" for abn in inputs)
+    enrich_file(str(tmp_path / "in.jsonl"), str(tmp_path / "out.jsonl"), db_path)
+    with open(tmp_path / "out.jsonl", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert records[0]["entity"]["abn"] == abns[0]
+    assert [record["entity"] is None for record in records] == [False, False, True, True]
+
+def test_jsonl_entity_key_is_replaced(search_db, tmp_path):
+    db_path, abns = search_db
+    (tmp_path / "in.jsonl").write_text(json.dumps({"entity": "old", "abn": abns[0]}) + "\n", encoding="utf-8")
+    enrich_file(str(tmp_path / "in.jsonl"), str(tmp_path / "out.jsonl"), db_path)
+    line = (tmp_path / "out.jsonl").read_text(encoding="utf-8")
+    assert line.count('"entity"') == 1
+    assert json.loads(line)["entity"]["abn"] == abns[0]
+
+@pytest.mark.parametrize("name, content", [
+    ("in.jsonl", '{"abn": "51824753556"}\n["51824753556"]\n'),
+    ("in.csv", "id,number\n1,51824753556\n"),
+])
+def test_bad_input_is_rejected(search_db, tmp_path, name, content):
+    (tmp_path / name).write_text(content, encoding="utf-8")
+    output = tmp_path / ("out" + name[2:])
+    with pytest.raises(ValueError):
+        enrich_file(str(tmp_path / name), str(output), search_db[0])
+    # The CSV header is checked before the output is created
+    if name.endswith(".csv"):
+        assert not output.exists()
@@ -0,0 +1,25 @@
+import sqlite3
+
+import pytest
+
+from conftest import abr_record, write_extract
+from parallel_ingest import run_parallel_ingest
+
+@pytest.mark.parametrize("commit_each_batch", [True, False])
+def test_on_change_sees_committed_rows(db_path, tmp_path, commit_each_batch):
+    abns = ["51824753556", "53004085616"]
+    xml_file = write_extract(tmp_path / "20250409_Public01.xml", [abr_record(abn) for abn in abns])
+    seen = []
+
+    def on_change(changed):
+        # What any other connection (e.g. a cache refilling) would read at this point
+        reader = sqlite3.connect(db_path)
+        visible = {abn for (abn,) in reader.execute("SELECT abn FROM abrs")}
+        reader.close()
+        assert changed <= visible
+        seen.extend(changed)
+
+    conn = sqlite3.connect(db_path, timeout=0.1)
+    run_parallel_ingest([xml_file], conn, workers=1, commit_each_batch=commit_each_batch, on_change=on_change)
+    conn.close()
+    assert sorted(seen) == abns
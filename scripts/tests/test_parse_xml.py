@@ -0,0 +1,111 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+
+from conftest import abr_record, table_rows, write_extract
+from index_db import add_indexes
+from parse_xml import INSERT_SQL, TABLES, iter_batches, process_all_files
+from setup_compact_db import setup_compact_database
+from setup_db import setup_database
+
+SCRIPTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_delta_load_on_database_without_entity_docs(tmp_path):
+    """A database created before entity_docs existed still takes a delta load."""
+    db_path = str(tmp_path / "old.db")
+    setup_database(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("DROP TABLE entity_docs")
+    conn.commit()
+    conn.close()
+
+    first = tmp_path / "first"
+    first.mkdir()
+    write_extract(first / "20250409_Public01.xml",
+                  [abr_record("51824753556", name="alpha pty ltd"), abr_record("53004085616", name="beta pty ltd")])
+    # Load the way it was loaded before: no entity_docs table to write to
+    conn = sqlite3.connect(db_path)
+    for _, batch in iter_batches(str(first / "20250409_Public01.xml")):
+        for table in TABLES[:-1]:
+            conn.executemany(INSERT_SQL[table], batch[table])
+    conn.commit()
+    conn.close()
+    add_indexes(db_path)
+
+    second = tmp_path / "second"
+    second.mkdir()
+    write_extract(second / "20250409_Public01.xml",
+                  [abr_record("51824753556", updated="20240101", name="alpha renamed pty ltd"),
+                   abr_record("53004085616", name="beta pty ltd")])
+    process_all_files(str(second), db_path, delta=True)
+
+    docs = {abn: json.loads(doc) for abn, doc in table_rows(db_path, "entity_docs")}
+    assert docs["51824753556"]["mainName"]["name"] == "alpha renamed pty ltd"
+    assert docs["53004085616"]["mainName"]["name"] == "beta pty ltd"
+
+def test_delta_upsert(db_path, tmp_path):
+    a, b, c, d = "51824753556", "53004085616", "33051775556", "11000000000"
+    first = tmp_path / "first"
+    first.mkdir()
+    write_extract(first / "20250409_Public01.xml", [
+        abr_record(a, name="alpha pty ltd", other_names=["alpha trading", "alpha two"]),
+        abr_record(b, name="beta pty ltd"),
+        abr_record(c, name="gamma pty ltd"),
+    ])
+    process_all_files(str(first), db_path)
+    add_indexes(db_path)
+
+    second = tmp_path / "second"
+    second.mkdir()
+    write_extract(second / "20250409_Public01.xml", [
+        # Changed: newer date, new name and fewer other names
+        abr_record(a, updated="20240101", name="alpha new pty ltd", state="VIC", other_names=["alpha new trading"]),
+        # Same date: ignored even though the content differs
+        abr_record(b, name="beta edited pty ltd"),
+        # New
+        abr_record(d, updated="20240101", name="delta pty ltd"),
+    ])
+    changes = []
+    process_all_files(str(second), db_path, delta=True, on_change=changes.append)
+
+    assert set().union(*changes) == {a, d}
+    assert table_rows(db_path, "abrs") == sorted([(a, "20240101"), (b, "20200101"), (c, "20200101"), (d, "20240101")])
+    names = dict((abn, name) for abn, _, name in table_rows(db_path, "main_entities"))
+    assert names == {a: "alpha new pty ltd", b: "beta pty ltd", c: "gamma pty ltd", d: "delta pty ltd"}
+    # The changed ABN's child rows were replaced, not added to
+    assert [row for row in table_rows(db_path, "other_entities") if row[0] == a] == [(a, "TRD", "alpha new trading")]
+    assert [row for row in table_rows(db_path, "addresses") if row[0] == a] == [(a, "VIC", "2000")]
+    assert json.loads(dict(table_rows(db_path, "entity_docs"))[a])["otherNames"] == [
+        {"name": "alpha new trading", "type": "TRD"}]
+
+def test_delta_load_creates_missing_abn_indexes(db_path, tmp_path):
+    write_extract(tmp_path / "20250409_Public01.xml", [abr_record("51824753556")])
+    process_all_files(str(tmp_path), db_path, delta=True)
+
+    conn = sqlite3.connect(db_path)
+    indexes = {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    conn.close()
+    assert {f"idx_{table}_abn" for table in TABLES[:-1]} <= indexes
+    assert table_rows(db_path, "abrs") == [("51824753556", "20200101")]
+
+def test_compact_flag_loads_the_compact_schema(tmp_path):
+    db_path = str(tmp_path / "compact.db")
+    setup_compact_database(db_path)
+    write_extract(tmp_path / "20250409_Public01.xml", [abr_record("51824753556", name="alpha pty ltd")])
+    subprocess.run([sys.executable, "parse_xml.py", str(tmp_path), db_path, "--compact"], cwd=SCRIPTS, check=True,
+                   capture_output=True)
+    assert table_rows(db_path, "abrs") == [("51824753556", "20200101")]
+    assert [name for _, _, name in table_rows(db_path, "main_entities")] == ["alpha pty ltd"]
+
+def test_metrics_and_profile_flags(db_path, tmp_path):
+    xml_dir = tmp_path / "xml"
+    xml_dir.mkdir()
+    write_extract(xml_dir / "20250409_Public01.xml", [abr_record("51824753556")])
+    metrics_path = tmp_path / "ingest.jsonl"
+    subprocess.run([sys.executable, "parse_xml.py", str(xml_dir), db_path, "--metrics", str(metrics_path),
+                    "--profile", str(tmp_path / "prof")], cwd=SCRIPTS, check=True, capture_output=True)
+    snapshots = [json.loads(line) for line in metrics_path.read_text(encoding="utf-8").splitlines()]
+    assert snapshots
+    assert os.listdir(tmp_path / "prof") == ["20250409_Public01.xml.prof"]
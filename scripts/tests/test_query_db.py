@@ -0,0 +1,63 @@
+import shutil
+import sqlite3
+
+import pytest
+
+from query_db import connect_readonly, count_names, search_names, search_names_page
+
+@pytest.fixture
+def cursor(search_db):
+    conn = connect_readonly(search_db[0])
+    yield conn.cursor()
+    conn.close()
+
+@pytest.mark.parametrize("state", ["N.S.W", "XX"])
+def test_partitions_without_a_partition_table_search_normally(cursor, state):
+    assert search_names(cursor, "aus", state, method="partitions") == search_names(cursor, "aus", state)
+    rows, _ = search_names_page(cursor, "aus", state, method="partitions")
+    assert rows == search_names_page(cursor, "aus", state)[0]
+
+def test_partitions_fall_back_when_a_state_has_no_index(search_db, tmp_path):
+    db_path = str(tmp_path / "copy.db")
+    shutil.copy(search_db[0], db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("DROP TABLE search_state_fts_vic")
+    cursor = conn.cursor()
+    expected = set(search_names(cursor, "aus", "VIC", limit=-1))
+    assert expected
+    assert set(search_names(cursor, "aus", "VIC", limit=-1, method="partitions")) == expected
+    conn.close()
+
+def test_count_modes(cursor):
+    cursor.execute("SELECT COUNT(*) FROM search_names")
+    names = cursor.fetchone()[0]
+    abns = {row[0] for row in search_names(cursor, "pty", limit=-1)}
+    assert count_names(cursor, "pty") == (len(abns), True)
+    assert count_names(cursor, "pty", mode="at_least", cap=10) == (10, False)
+    estimate, exact = count_names(cursor, "p", mode="estimate")
+    assert not exact
+    assert 0 < estimate <= names
+
+@pytest.mark.parametrize("order", ["rank", "id"])
+def test_page_tokens_walk_every_abn_once(cursor, order):
+    expected = {row[0] for row in search_names(cursor, "aus", "NSW", limit=-1)}
+    seen = []
+    token = None
+    while True:
+        rows, token = search_names_page(cursor, "aus", "NSW", limit=7, after=token, order=order)
+        seen.extend(row[0] for row in rows)
+        if not token:
+            break
+    assert len(seen) == len(set(seen))
+    assert set(seen) == expected
+
+@pytest.mark.parametrize("query, state, order", [("pty", "", "rank"), ("aus", "VIC", "rank"), ("aus", "", "id")])
+def test_page_token_from_another_search_is_rejected(cursor, query, state, order):
+    _, token = search_names_page(cursor, "aus", limit=2, order="rank")
+    assert token
+    with pytest.raises(ValueError):
+        search_names_page(cursor, query, state, after=token, order=order)
+
+def test_malformed_page_token_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        search_names_page(cursor, "aus", after="not a token")
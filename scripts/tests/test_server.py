@@ -0,0 +1,61 @@
+import asyncio
+import json
+import sqlite3
+
+from abr_service import server
+from abr_service.server import SearchService
+from query_db import connect_readonly, count_names
+
+def get(service, path):
+    """Send one request through handle_connection; returns (status, body)."""
+    async def run():
+        server = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {path} HTTP/1.1\r\nConnection: close\r\n\r\n".encode())
+        response = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return response
+
+    head, _, body = asyncio.run(run()).partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+def test_search_and_details(search_db):
+    db_path, abns = search_db
+    service = SearchService(db_path, workers=2)
+    status, body = get(service, "/api/search?query=aus&state=NSW")
+    assert status == 200
+    assert body["results"] and all(row["state"] == "NSW" for row in body["results"])
+    assert body["pagination"]["totalExact"]
+    status, body = get(service, f"/api/details?abn={abns[0]}")
+    assert status == 200 and body["abn"] == abns[0]
+    assert get(service, "/api/details?abn=00000000000")[0] == 404
+    service.close()
+
+def test_unexpected_errors_are_not_sent_to_the_client(search_db, capsys):
+    service = SearchService(search_db[0], workers=1)
+
+    async def failing(params):
+        raise sqlite3.OperationalError("no such column: secret_column in search_names_fts")
+    service.health = failing
+
+    status, body = get(service, "/health")
+    assert status == 500
+    assert body == {"error": "Internal server error"}
+    assert "secret_column" in capsys.readouterr().err
+    service.close()
+
+def test_name_search_total_is_capped(search_db, monkeypatch):
+    monkeypatch.setattr(server, "COUNT_AHEAD", 5)
+    conn = connect_readonly(search_db[0])
+    total, _ = count_names(conn.cursor(), "aus")
+    conn.close()
+    assert total > 25
+    service = SearchService(search_db[0], workers=1)
+    status, body = get(service, "/api/search?query=aus&page=2&pageSize=10")
+    assert status == 200
+    assert body["pagination"]["totalCount"] == 25
+    assert not body["pagination"]["totalExact"]
+    service.close()
@@ -0,0 +1,98 @@
+import gzip
+import os
+import subprocess
+import sys
+import zipfile
+
+import pytest
+
+from conftest import abr_record, extract_xml, table_rows
+from parse_xml import iter_batches, list_xml_files, open_source, process_all_files
+
+SCRIPTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def extract_bytes(*abns):
+    return extract_xml([abr_record(abn) for abn in abns]).encode()
+
+def abns_in(source):
+    return [row[0] for _, batch in iter_batches(source) for row in batch["abrs"]]
+
+@pytest.fixture
+def sources(tmp_path):
+    """A directory mixing a zip of two extract files, a gzip one and a stray file; returns (dir, abns by file)."""
+    files = {f"20250409_Public0{n}.xml": [f"5182475355{n}", f"5300408561{n}"] for n in range(1, 4)}
+    with zipfile.ZipFile(tmp_path / "public_split_1_2.zip", "w", zipfile.ZIP_DEFLATED) as archive:
+        for name in ("20250409_Public02.xml", "20250409_Public01.xml"):
+            archive.writestr(name, extract_bytes(*files[name]))
+        archive.writestr("readme.txt", "not an extract")
+    with gzip.open(tmp_path / "20250409_Public03.xml.gz", "wb") as f:
+        f.write(extract_bytes(*files["20250409_Public03.xml"]))
+    (tmp_path / "notes.xml").write_text("<x/>")
+    return tmp_path, files
+
+def test_list_xml_files_orders_members_and_compressed_files(sources):
+    xml_dir, _ = sources
+    zip_path = os.path.join(str(xml_dir), "public_split_1_2.zip")
+    assert list_xml_files(str(xml_dir)) == [
+        f"{zip_path}!20250409_Public01.xml",
+        f"{zip_path}!20250409_Public02.xml",
+        os.path.join(str(xml_dir), "20250409_Public03.xml.gz"),
+    ]
+    assert list_xml_files(zip_path) == list_xml_files(str(xml_dir))[:2]
+    assert list_xml_files("-") == ["-"]
+
+def test_sources_are_read_in_place(sources):
+    xml_dir, files = sources
+    for source in list_xml_files(str(xml_dir)):
+        name = os.path.basename(source.split("!")[-1]).replace(".gz", "")
+        assert abns_in(source) == files[name]
+    assert sorted(os.listdir(xml_dir)) == ["20250409_Public03.xml.gz", "notes.xml", "public_split_1_2.zip"]
+
+def test_open_source_counts_uncompressed_bytes(sources):
+    xml_dir, files = sources
+    with open_source(os.path.join(str(xml_dir), "20250409_Public03.xml.gz")) as f:
+        data = f.read()
+        assert f.tell() == len(data) == len(extract_bytes(*files["20250409_Public03.xml"]))
+
+def test_zstd_file(tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    path = tmp_path / "20250409_Public01.xml.zst"
+    path.write_bytes(zstandard.ZstdCompressor().compress(extract_bytes("51824753556")))
+    assert abns_in(str(path)) == ["51824753556"]
+
+def test_load_from_directory_matches_members(sources, db_path):
+    xml_dir, files = sources
+    process_all_files(str(xml_dir), db_path)
+    assert [abn for abn, _ in table_rows(db_path, "abrs")] == sorted(abn for abns in files.values() for abn in abns)
+
+@pytest.mark.parametrize("compress", [lambda data: data, gzip.compress])
+def test_load_from_stdin(db_path, compress):
+    data = compress(extract_bytes("51824753556", "53004085616"))
+    subprocess.run([sys.executable, "parse_xml.py", "-", db_path], input=data, cwd=SCRIPTS, check=True,
+                   capture_output=True)
+    assert [abn for abn, _ in table_rows(db_path, "abrs")] == ["51824753556", "53004085616"]
+    # stdin can't be resumed, so it leaves no checkpoint
+    assert table_rows(db_path, "ingest_progress") == []
+
+def test_zip_on_stdin_is_rejected(sources, db_path):
+    xml_dir, _ = sources
+    data = (xml_dir / "public_split_1_2.zip").read_bytes()
+    result = subprocess.run([sys.executable, "parse_xml.py", "-", db_path], input=data, cwd=SCRIPTS,
+                            capture_output=True)
+    assert result.returncode != 0
+    assert b"zip archive" in result.stderr
+
+def test_any_release_date_is_listed(tmp_path, db_path):
+    path = tmp_path / "20250416_Public01.xml"
+    path.write_bytes(extract_bytes("51824753556"))
+    assert list_xml_files(str(tmp_path)) == [str(path)]
+    process_all_files(str(tmp_path), db_path)
+    assert [abn for abn, _ in table_rows(db_path, "abrs")] == ["51824753556"]
+
+def test_no_sources_is_an_error(tmp_path, db_path):
+    (tmp_path / "notes.xml").write_text("<x/>")
+    with pytest.raises(FileNotFoundError):
+        process_all_files(str(tmp_path), db_path)
+    with pytest.raises(FileNotFoundError):
+        list_xml_files(str(tmp_path / "missing"))
+    assert table_rows(db_path, "abrs") == []